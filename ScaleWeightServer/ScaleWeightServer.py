@@ -2,28 +2,2804 @@
 """
 Scale Weight Server - Desktop Application
 Professional GUI for managing scale weight readings with simulation and real hardware modes
+
+Run with ``--headless`` to serve scales without any GUI (Linux gateways).
 """
 
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import threading
-import random
-import serial
-import serial.tools.list_ports
-from flask import Flask, jsonify, request
-from datetime import datetime
-import logging
-import os
-import socket
-from werkzeug.serving import make_server
-from PIL import Image, ImageDraw
-import pystray
+import argparse
+import bisect
+import contextlib
+import copy
+import functools
+import mmap
+import signal
+import sys
+import threading
+import random
+import time
+import json
+import math
+import re
+import struct
+from collections import deque, namedtuple
+import serial
+import serial.tools.list_ports
+from flask import Flask, Response, abort, g, jsonify, request
+from datetime import datetime, timezone
+import logging
+import logging.handlers
+import queue
+import os
+import socket
+import sqlite3
+import tempfile
+import urllib.request
+import uuid
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+# GUI toolkits are only imported by load_gui_modules(), so headless gateways
+# need neither a display nor tkinter, pystray or Pillow
+tk = ttk = messagebox = scrolledtext = None
+Image = ImageDraw = pystray = None
+
+
+def load_gui_modules():
+    """Import the desktop GUI dependencies on demand"""
+    global tk, ttk, messagebox, scrolledtext, Image, ImageDraw, pystray
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext
+    from PIL import Image, ImageDraw
+    import pystray
+
+
+# Folder of the executable (frozen build) or of this script: config and logs
+# live next to it
+APP_DIR = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, 'frozen', False) else __file__))
+
+
+# Immutable snapshot of one reading. The acquisition thread publishes a new
+# tuple by swapping a single reference, so readers never need a lock.
+# ``weight`` is after the channel's filter chain, ``raw_weight`` as decoded.
+WeightReading = namedtuple('WeightReading', ['weight', 'timestamp', 'seq', 'stable', 'stable_weight',
+                                             'unit', 'motion', 'overload', 'net', 'raw_weight'])
+
+EMPTY_READING = WeightReading(0.0, None, 0, False, None, None, False, False, False, 0.0)
+
+# A connected source without a reading for this long (seconds) is reported
+# as "stale" so consumers can tell a frozen value from a live one
+READING_STALE_AFTER = 3.0
+
+# Upper bound for ?wait_stable and long-poll ?timeout so a client cannot pin a
+# request thread forever
+MAX_WAIT_STABLE_MS = 30000
+
+
+class StabilityDetector:
+    """Motion detection over a sliding time window of readings
+
+    The scale is considered stable once every sample in the last ``window``
+    seconds lies within ``max_deviation`` kg of each other, and that has
+    held for at least ``min_duration`` seconds.
+    """
+
+    def __init__(self, window=1.0, max_deviation=20.0, min_duration=2.0):
+        self.window = window
+        self.max_deviation = max_deviation
+        self.min_duration = min_duration
+        self._samples = deque()
+        self._stable_since = None
+
+    def reset(self):
+        self._samples.clear()
+        self._stable_since = None
+
+    def update(self, weight, timestamp):
+        """Feed one sample and return (stable, stable_weight)"""
+        samples = self._samples
+        samples.append((timestamp, weight))
+        horizon = timestamp - self.window
+        while samples[0][0] < horizon:
+            samples.popleft()
+
+        low = high = weight
+        total = 0.0
+        for _, value in samples:
+            if value < low:
+                low = value
+            elif value > high:
+                high = value
+            total += value
+
+        if high - low > self.max_deviation:
+            self._stable_since = None
+            return False, None
+
+        if self._stable_since is None:
+            self._stable_since = timestamp
+        if timestamp - self._stable_since < self.min_duration:
+            return False, None
+        return True, round(total / len(samples), 2)
+
+
+# ---------------------------------------------------------------------------
+# Reading filters
+# ---------------------------------------------------------------------------
+
+
+def _window_size(size):
+    """Validated window size of a filter; filters run unguarded in the acquisition thread"""
+    size = int(size)
+    if size < 1:
+        raise ValueError(f"'size' must be at least 1, got {size}")
+    return size
+
+
+class MedianFilter:
+    """Median of the last ``size`` samples; rejects single-sample spikes
+
+    The window is a preallocated ring plus a sorted copy kept up to date
+    with bisect, so a sample costs two O(size) list shifts and no allocation.
+    """
+
+    name = "median"
+
+    def __init__(self, size=5):
+        self.size = _window_size(size)
+        self._ring = [0.0] * self.size
+        self._sorted = [0.0] * self.size
+        self.reset()
+
+    def reset(self):
+        self._count = 0
+        self._index = 0
+
+    def apply(self, value):
+        ordered = self._sorted
+        if self._count < self.size:
+            # Filling up: the sorted window is the first _count slots
+            bisect.insort(ordered, value, 0, self._count)
+            ordered.pop()
+            self._count += 1
+        else:
+            del ordered[bisect.bisect_left(ordered, self._ring[self._index])]
+            bisect.insort(ordered, value)
+        self._ring[self._index] = value
+        self._index = (self._index + 1) % self.size
+        count = self._count
+        middle = count // 2
+        if count % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class MovingAverageFilter:
+    """Mean of the last ``size`` samples, kept as a running sum over a ring"""
+
+    name = "average"
+
+    def __init__(self, size=5):
+        self.size = _window_size(size)
+        self._ring = [0.0] * self.size
+        self.reset()
+
+    def reset(self):
+        self._count = 0
+        self._index = 0
+        self._total = 0.0
+
+    def apply(self, value):
+        if self._count < self.size:
+            self._count += 1
+        else:
+            self._total -= self._ring[self._index]
+        self._ring[self._index] = value
+        self._total += value
+        self._index = (self._index + 1) % self.size
+        return self._total / self._count
+
+
+class EmaFilter:
+    """Exponential moving average; ``alpha`` is the weight of the newest sample"""
+
+    name = "ema"
+
+    def __init__(self, alpha=0.3):
+        self.alpha = float(alpha)
+        if not 0.0 < self.alpha <= 1.0:
+            # 0 would freeze the output at the first sample
+            raise ValueError(f"'alpha' must be in (0, 1], got {alpha}")
+        self.reset()
+
+    def reset(self):
+        self._value = None
+
+    def apply(self, value):
+        if self._value is None:
+            self._value = value
+        else:
+            self._value += self.alpha * (value - self._value)
+        return self._value
+
+
+class GraduationFilter:
+    """Round to the indicator's display division ``d`` (e.g. 10 or 20 kg)"""
+
+    name = "graduation"
+
+    def __init__(self, division=10.0):
+        self.division = float(division)
+        if not (math.isfinite(self.division) and self.division > 0):
+            raise ValueError(f"'division' must be a positive number, got {division}")
+
+    def reset(self):
+        pass
+
+    def apply(self, value):
+        return round(value / self.division) * self.division
+
+
+FILTERS = {cls.name: cls for cls in (MedianFilter, MovingAverageFilter, EmaFilter, GraduationFilter)}
+
+
+class FilterChain:
+    """Filters applied in order between decoding and publishing"""
+
+    def __init__(self, filters):
+        self.filters = list(filters)
+
+    def reset(self):
+        for stage in self.filters:
+            stage.reset()
+
+    def apply(self, value):
+        for stage in self.filters:
+            value = stage.apply(value)
+        return value
+
+    def describe(self):
+        return " > ".join(stage.name for stage in self.filters)
+
+
+def create_filter_chain(specs):
+    """Build a FilterChain from config, e.g. [{"type": "median", "size": 5}]; None if empty
+
+    Raises ValueError for an invalid spec, so a bad config is rejected when
+    the channel starts instead of killing its acquisition thread later.
+    """
+    if not specs:
+        return None
+    filters = []
+    for spec in specs:
+        options = dict(spec)
+        kind = options.pop('type', None)
+        if kind not in FILTERS:
+            raise ValueError(f"Unknown filter '{kind}' (expected one of: {', '.join(FILTERS)})")
+        try:
+            filters.append(FILTERS[kind](**options))
+        except (TypeError, ValueError) as e:
+            # Out of range, not a number, or an unknown option name
+            raise ValueError(f"Invalid '{kind}' filter {options}: {e}") from e
+    return FilterChain(filters)
+
+
+# ---------------------------------------------------------------------------
+# Indicator protocols
+# ---------------------------------------------------------------------------
+
+STX = 0x02
+ETX = 0x03
+CR = 0x0D
+LF = 0x0A
+
+# Decoded content of one indicator frame. ``weight`` is always in kg (None
+# when the frame only carries a status such as SICS overload).
+DecodedFrame = namedtuple('DecodedFrame', ['weight', 'unit', 'motion', 'overload', 'net'])
+
+UNIT_TO_KG = {'kg': 1.0, 'g': 0.001, 't': 1000.0, 'lb': 0.45359237}
+
+_LINE_END = re.compile(rb'[\r\n]')
+
+
+class FrameError(ValueError):
+    """A frame could not be decoded; ``reason`` is a short metrics label"""
+
+    def __init__(self, reason, frame=b''):
+        super().__init__(f"{reason}: {frame[:40]!r}")
+        self.reason = reason
+        self.frame = frame
+
+
+class FrameSplitter:
+    """Incremental byte-level framer
+
+    With ``start`` set, frames run from the start byte to ``end`` (bytes in
+    between are discarded); otherwise frames are terminated by CR or LF.
+    Partial frames are kept until the rest arrives.
+    """
+
+    MAX_FRAME = 256
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+        self._buffer = bytearray()
+
+    def reset(self):
+        self._buffer.clear()
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        if self.start is None:
+            while True:
+                match = _LINE_END.search(buffer)
+                if match is None:
+                    break
+                end = match.start()
+                if end:
+                    frames.append(bytes(buffer[:end]))
+                del buffer[:end + 1]
+        else:
+            while True:
+                begin = buffer.find(self.start)
+                if begin < 0:
+                    buffer.clear()
+                    break
+                end = buffer.find(self.end, begin + 1)
+                if end < 0:
+                    del buffer[:begin]
+                    break
+                # Resynchronise if a later start byte precedes the terminator
+                begin = buffer.rfind(self.start, begin, end)
+                frames.append(bytes(buffer[begin + 1:end]))
+                del buffer[:end + 1]
+        if len(buffer) > self.MAX_FRAME:
+            buffer.clear()
+        return frames
+
+
+class IndicatorProtocol:
+    """Base class for indicator output formats
+
+    ``decode`` turns one frame (without framing bytes) into a DecodedFrame
+    or raises FrameError; ``encode`` produces a complete framed message and
+    is used by the simulator.
+    """
+
+    name = None
+    label = None
+    start = None
+    end = None
+
+    def create_splitter(self):
+        return FrameSplitter(self.start, self.end)
+
+    def decode(self, frame):
+        raise NotImplementedError
+
+    def encode(self, weight, motion=False, overload=False, net=False):
+        raise NotImplementedError
+
+    @staticmethod
+    def _unit_factor(unit):
+        factor = UNIT_TO_KG.get(unit)
+        if factor is None:
+            raise FrameError('unknown_unit', unit.encode())
+        return factor
+
+
+class GenericProtocol(IndicatorProtocol):
+    """Line-based output matched with a regular expression
+
+    The pattern must capture the number in group ``weight`` (or group 1) and
+    may capture ``sign`` and ``unit``. Comma decimals and digit grouping
+    (``1,234.5`` or ``1.234,5``) are accepted. With ``decimal_mark`` unset,
+    the last of two different marks is the decimal one, a mark repeated on
+    its own is grouping (``1,234,567``) and a single mark is decimal
+    (``12,5``). An indicator that prints grouped whole numbers such as
+    ``1,234`` needs ``decimal_mark`` set to ``.`` to be read as 1234.
+    """
+
+    name = 'generic'
+    label = 'Generic (regex)'
+    DEFAULT_PATTERN = (rb'(?P<sign>[+-]?)\s*(?P<weight>\d{1,3}(?:[.,]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?)'
+                       rb'\s*(?P<unit>kg|lb|g|t)?\b')
+    DECIMAL_MARKS = ('.', ',')
+
+    def __init__(self, pattern=None, default_unit='kg', decimal_mark=None):
+        if isinstance(pattern, str):
+            pattern = pattern.encode()
+        self.pattern = re.compile(pattern or self.DEFAULT_PATTERN, re.IGNORECASE)
+        self.default_unit = default_unit
+        if decimal_mark and decimal_mark not in self.DECIMAL_MARKS:
+            raise ValueError(f"Decimal mark must be '.' or ',', got {decimal_mark!r}")
+        self.decimal_mark = decimal_mark.encode() if decimal_mark else None
+        groups = self.pattern.groupindex
+        self._weight_group = 'weight' if 'weight' in groups else 1
+        self._sign_group = 'sign' if 'sign' in groups else None
+        self._unit_group = 'unit' if 'unit' in groups else None
+
+    def decode(self, frame):
+        match = self.pattern.search(frame)
+        if match is None:
+            raise FrameError('no_match', frame)
+        weight = self._parse_number(match.group(self._weight_group), frame)
+        if self._sign_group and match.group(self._sign_group) == b'-':
+            weight = -weight
+        unit = self.default_unit
+        if self._unit_group and match.group(self._unit_group):
+            unit = match.group(self._unit_group).decode('ascii').lower()
+        return DecodedFrame(weight * self._unit_factor(unit), unit, False, False, False)
+
+    def _parse_number(self, text, frame):
+        """Value of the weight text; digit grouping is dropped, never read as decimals"""
+        decimal = self.decimal_mark
+        if decimal is None:
+            last = max(text.rfind(b'.'), text.rfind(b','))
+            mark = text[last:last + 1]
+            if mark and (b'.' in text and b',' in text or text.count(mark) == 1):
+                decimal = mark
+        integer, fraction = text, b''
+        if decimal is not None and decimal in text:
+            integer, _, fraction = text.rpartition(decimal)
+        grouping = set(re.findall(rb'[.,]', integer))
+        if (re.search(rb'[.,]', fraction) or len(grouping) > 1 or decimal in grouping or
+                grouping and not re.fullmatch(rb'\d{1,3}(?:[.,]\d{3})+', integer)):
+            raise FrameError('bad_digits', frame)
+        try:
+            return float(re.sub(rb'[.,]', b'', integer) + b'.' + (fraction or b'0'))
+        except ValueError:
+            raise FrameError('bad_digits', frame) from None
+
+    def encode(self, weight, motion=False, overload=False, net=False):
+        return f"{weight:10.2f} kg\r\n".encode('ascii')
+
+
+class ToledoContinuousProtocol(IndicatorProtocol):
+    """Mettler-Toledo continuous output
+
+    <STX><SWA><SWB><SWC><6 weight digits><6 tare digits><CR>[checksum].
+    SWA bits 0-2 give the decimal position; SWB carries net, sign,
+    out-of-range, motion and kg/lb flags.
+    """
+
+    name = 'toledo'
+    label = 'Mettler-Toledo continuous'
+    start = bytes([STX])
+    end = bytes([CR])
+    DECIMAL_FACTORS = (100.0, 10.0, 1.0, 0.1, 0.01, 0.001, 0.0001, 0.00001)
+
+    def decode(self, frame):
+        if len(frame) < 15:
+            raise FrameError('short_frame', frame)
+        swa = frame[0]
+        swb = frame[1]
+        try:
+            value = int(frame[3:9])
+        except ValueError:
+            raise FrameError('bad_digits', frame) from None
+        weight = value * self.DECIMAL_FACTORS[swa & 0x07]
+        if swb & 0x02:
+            weight = -weight
+        unit = 'kg' if swb & 0x10 else 'lb'
+        return DecodedFrame(weight * UNIT_TO_KG[unit], unit,
+                            bool(swb & 0x08), bool(swb & 0x04), bool(swb & 0x01))
+
+    def encode(self, weight, motion=False, overload=False, net=False):
+        magnitude = abs(weight)
+        for code in (4, 3, 2):
+            digits = round(magnitude / self.DECIMAL_FACTORS[code])
+            if digits <= 999999:
+                break
+        else:
+            code, digits, overload = 2, 999999, True
+        swa = 0x20 | (1 << 3) | code
+        swb = 0x20 | 0x10 | (0x01 if net else 0) | (0x02 if weight < 0 else 0) \
+            | (0x04 if overload else 0) | (0x08 if motion else 0)
+        swc = 0x20
+        body = bytes([STX, swa, swb, swc]) + b'%06d000000' % digits + bytes([CR])
+        checksum = (-sum(body)) & 0x7F
+        return body + bytes([checksum])
+
+
+class SicsProtocol(IndicatorProtocol):
+    """Mettler-Toledo MT-SICS weight responses (S / SI / SIR)
+
+    ``S S <weight> <unit>`` is stable, ``S D`` dynamic (motion), ``S +`` and
+    ``S -`` report overload and underload.
+    """
+
+    name = 'sics'
+    label = 'Mettler-Toledo SICS'
+    PATTERN = re.compile(rb'^\s*S\s+([SD])\s+([+-]?)\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]+)?\s*$')
+
+    def decode(self, frame):
+        match = self.PATTERN.match(frame)
+        if match is None:
+            status = frame.strip()
+            if status in (b'S +', b'S -'):
+                return DecodedFrame(None, None, False, True, False)
+            if status.startswith((b'S I', b'ES', b'ET', b'EL')):
+                raise FrameError('indicator_error', frame)
+            raise FrameError('no_match', frame)
+        weight = float(match.group(3))
+        if match.group(2) == b'-':
+            weight = -weight
+        unit = (match.group(4) or b'kg').decode('ascii').lower()
+        return DecodedFrame(weight * self._unit_factor(unit), unit,
+                            match.group(1) == b'D', False, False)
+
+    def encode(self, weight, motion=False, overload=False, net=False):
+        if overload:
+            return b'S +\r\n'
+        return f"S {'D' if motion else 'S'} {weight:10.2f} kg\r\n".encode('ascii')
+
+
+class CardinalProtocol(IndicatorProtocol):
+    """Avery Weigh-Tronix / Cardinal style line output
+
+    ``<sign><weight> <unit> <G|N> <status>`` where the status letters are M
+    (motion), O (overload) and Z (centre of zero), optionally framed by
+    STX/ETX which is ignored.
+    """
+
+    name = 'cardinal'
+    label = 'Avery / Cardinal'
+    PATTERN = re.compile(rb'^[\x02\s]*([+-]?)\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]{1,2})?\s+'
+                         rb'(G|N|GR|NT|GROSS|NET)?\s*([MOZ ]*)[\x03\s]*$', re.IGNORECASE)
+
+    def decode(self, frame):
+        match = self.PATTERN.match(frame)
+        if match is None:
+            raise FrameError('no_match', frame)
+        weight = float(match.group(2))
+        if match.group(1) == b'-':
+            weight = -weight
+        unit = (match.group(3) or b'kg').decode('ascii').lower()
+        mode = (match.group(4) or b'G').upper()
+        status = match.group(5).upper()
+        return DecodedFrame(weight * self._unit_factor(unit), unit,
+                            b'M' in status, b'O' in status, mode.startswith(b'N'))
+
+    def encode(self, weight, motion=False, overload=False, net=False):
+        status = ('M' if motion else '') + ('O' if overload else '')
+        return f"{weight:9.1f} kg {'N' if net else 'G'} {status}\r\n".encode('ascii')
+
+
+class RinstrumProtocol(IndicatorProtocol):
+    """Rinstrum automatic output: <STX><sign><7 chars weight><status><ETX>
+
+    Status is G (gross), N (net), M (motion), O (overload), U (underload) or
+    E (error).
+    """
+
+    name = 'rinstrum'
+    label = 'Rinstrum auto output'
+    start = bytes([STX])
+    end = bytes([ETX])
+
+    def decode(self, frame):
+        if len(frame) < 9:
+            raise FrameError('short_frame', frame)
+        status = frame[-1:]
+        if status == b'E':
+            raise FrameError('indicator_error', frame)
+        try:
+            weight = float(frame[1:-1])
+        except ValueError:
+            raise FrameError('bad_digits', frame) from None
+        if frame[:1] == b'-':
+            weight = -weight
+        return DecodedFrame(weight, 'kg', status == b'M', status in (b'O', b'U'), status == b'N')
+
+    def encode(self, weight, motion=False, overload=False, net=False):
+        status = 'O' if overload else 'M' if motion else 'N' if net else 'G'
+        sign = '-' if weight < 0 else ' '
+        return f"\x02{sign}{abs(weight):7.1f}{status}\x03".encode('ascii')
+
+
+PROTOCOLS = {protocol.name: protocol for protocol in (
+    GenericProtocol, ToledoContinuousProtocol, SicsProtocol, CardinalProtocol, RinstrumProtocol)}
+
+
+def create_protocol(name, pattern=None, decimal_mark=None):
+    """Instantiate an indicator protocol by name"""
+    protocol_class = PROTOCOLS.get(name)
+    if protocol_class is None:
+        raise ValueError(f"Unknown indicator protocol '{name}'")
+    if protocol_class is GenericProtocol:
+        return GenericProtocol(pattern, decimal_mark=decimal_mark)
+    return protocol_class()
+
+
+# Defaults for /stream_weight, overridable per subscriber via query string
+STREAM_MIN_DELTA = 0.0
+STREAM_MAX_RATE = 10.0
+STREAM_KEEPALIVE = 15.0
+
+
+class StreamSubscriber:
+    """One /stream_weight client: a single conflating slot plus a wake-up event
+
+    Weight consumers only care about the newest value, so instead of a queue
+    each subscriber holds just the latest reading that passed its filter.
+    """
+
+    def __init__(self, client, min_delta=STREAM_MIN_DELTA, max_rate=STREAM_MAX_RATE):
+        self.client = client
+        self.min_delta = min_delta
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.pending = None
+        self.event = threading.Event()
+        self._last_sent = None
+        self._last_sent_at = 0.0
+
+    def offer(self, reading):
+        """Called from the acquisition thread for every published reading"""
+        last = self._last_sent
+        if last is not None:
+            if reading.stable == last.stable and abs(reading.weight - last.weight) <= self.min_delta:
+                return
+            if reading.timestamp - self._last_sent_at < self.min_interval:
+                return
+        self._last_sent = reading
+        self._last_sent_at = reading.timestamp
+        self.pending = reading
+        self.event.set()
+
+    def take(self, timeout):
+        """Wait for the next reading; None on timeout"""
+        if not self.event.wait(timeout):
+            return None
+        self.event.clear()
+        reading, self.pending = self.pending, None
+        return reading
+
+
+class ReadingBroadcaster:
+    """Fan-out of published readings to all stream subscribers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Copy-on-write tuple so the acquisition thread iterates without locking
+        self._subscribers = ()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = self._subscribers + (subscriber,)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscriber)
+        subscriber.event.set()
+
+    def publish(self, reading):
+        for subscriber in self._subscribers:
+            subscriber.offer(reading)
+
+    def wake_all(self):
+        """Release every waiting stream so it can notice a shutdown"""
+        for subscriber in self._subscribers:
+            subscriber.event.set()
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+# Histogram bucket upper bounds (seconds)
+HTTP_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STABILITY_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+class MetricsRegistry:
+    """Counters and histograms sharded per thread
+
+    Each thread updates its own dict (registered once, on first use), so
+    the acquisition and request paths never take a lock; a scrape sums the
+    shards. Series are keyed by (name, labels) with labels a tuple of
+    (label, value) pairs.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self.descriptions = {}
+
+    def describe(self, name, kind, text, buckets=None):
+        self.descriptions[name] = (kind, text, buckets)
+
+    def _shard(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def inc(self, name, labels=(), amount=1):
+        values = self._shard()
+        key = (name, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        """Add value to a histogram: per-bucket counts (last one +Inf), count, sum"""
+        values = self._shard()
+        key = (name, labels)
+        histogram = values.get(key)
+        buckets = self.descriptions[name][2]
+        if histogram is None:
+            histogram = values[key] = [0] * (len(buckets) + 2) + [0.0]
+        histogram[bisect.bisect_left(buckets, value)] += 1
+        histogram[-2] += 1
+        histogram[-1] += value
+
+    def collect(self):
+        """Sum all shards into {(name, labels): value or histogram list}"""
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            for key, value in list(shard.items()):
+                if isinstance(value, list):
+                    total = totals.get(key)
+                    totals[key] = value[:] if total is None else [a + b for a, b in zip(total, value)]
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+METRICS = MetricsRegistry()
+METRICS.describe('scale_frames_total', 'counter', "Indicator frames split from the serial stream")
+METRICS.describe('scale_bytes_total', 'counter', "Raw bytes read from the indicator")
+METRICS.describe('scale_frame_errors_total', 'counter', "Frames that failed to decode, by reason")
+METRICS.describe('scale_source_connects_total', 'counter', "Successful (re)connections to the weight source")
+METRICS.describe('scale_source_errors_total', 'counter', "Serial errors that dropped the connection")
+METRICS.describe('scale_stability_seconds', 'histogram', "Time from first motion to a stable weight",
+                 STABILITY_BUCKETS)
+METRICS.describe('scale_http_requests_total', 'counter', "HTTP requests by route, method and status")
+METRICS.describe('scale_http_request_duration_seconds', 'histogram', "HTTP response time by route",
+                 HTTP_LATENCY_BUCKETS)
+METRICS.describe('scale_udp_datagrams_total', 'counter', "Readings published as UDP datagrams")
+METRICS.describe('scale_udp_errors_total', 'counter', "UDP datagrams that could not be sent")
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels) + '}'
+
+
+def render_prometheus(totals, gauges):
+    """Prometheus text exposition of collected series plus gauges
+
+    gauges is a list of (name, help, [(labels, value)]) computed at scrape.
+    """
+    series = {}
+    for (name, labels), value in totals.items():
+        series.setdefault(name, []).append((labels, value))
+    lines = []
+    for name, (kind, text, buckets) in METRICS.descriptions.items():
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series.get(name, ())):
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (float('inf'),), value):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value[-2]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-1]:.6f}")
+    for name, text, values in gauges:
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in values:
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_json(totals, gauges):
+    """Same data as render_prometheus, as {name: [{labels, value | histogram}]}"""
+    result = {}
+    for (name, labels), value in sorted(totals.items()):
+        entry = {'labels': dict(labels)}
+        buckets = METRICS.descriptions[name][2]
+        if buckets is None:
+            entry['value'] = value
+        else:
+            entry['buckets'] = dict(zip([str(bound) for bound in buckets] + ['+Inf'], value[:-2]))
+            entry['count'] = value[-2]
+            entry['sum'] = round(value[-1], 6)
+        result.setdefault(name, []).append(entry)
+    for name, _, values in gauges:
+        result[name] = [{'labels': dict(labels), 'value': value} for labels, value in values]
+    return result
+
+
+# ---------------------------------------------------------------------------
+# UDP publishing
+# ---------------------------------------------------------------------------
+
+# One datagram per reading, network byte order, 41 bytes:
+#   magic "SWU1", channel id (16 bytes UTF-8, NUL padded), seq (uint32),
+#   weight (float64), flags (uint8), timestamp (float64, Unix seconds)
+UDP_MAGIC = b'SWU1'
+UDP_DATAGRAM = struct.Struct('!4s16sIdBd')
+UDP_FLAG_STABLE = 0x01
+UDP_FLAG_MOTION = 0x02
+UDP_FLAG_OVERLOAD = 0x04
+UDP_FLAG_NET = 0x08
+
+
+class UdpPublisher:
+    """Send every reading to a multicast group (or broadcast/unicast address)
+
+    One non-blocking send per reading from the acquisition thread serves any
+    number of listeners; when the socket buffer is full the datagram is
+    dropped rather than delaying acquisition.
+    """
+
+    def __init__(self, group, port, ttl=1, interface=None):
+        self.address = (group, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        # Listeners on this machine receive the group too
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if interface:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+        self.sock.setblocking(False)
+
+    def describe(self):
+        return f"udp://{self.address[0]}:{self.address[1]}"
+
+    def sender(self, channel_id):
+        """Callable publishing one channel's readings"""
+        name = channel_id.encode('utf-8')[:16]
+        labels = (('scale', channel_id),)
+        return functools.partial(self.send, name, labels)
+
+    def send(self, name, labels, reading):
+        flags = ((UDP_FLAG_STABLE if reading.stable else 0) | (UDP_FLAG_MOTION if reading.motion else 0) |
+                 (UDP_FLAG_OVERLOAD if reading.overload else 0) | (UDP_FLAG_NET if reading.net else 0))
+        datagram = UDP_DATAGRAM.pack(UDP_MAGIC, name, reading.seq & 0xFFFFFFFF, reading.weight,
+                                     flags, reading.timestamp)
+        try:
+            self.sock.sendto(datagram, self.address)
+        except OSError:
+            METRICS.inc('scale_udp_errors_total', labels)
+        else:
+            METRICS.inc('scale_udp_datagrams_total', labels)
+
+    def close(self):
+        self.sock.close()
+
+
+# ---------------------------------------------------------------------------
+# History store
+# ---------------------------------------------------------------------------
+
+# Flag bits of a stored reading
+HISTORY_MOTION = 0x01
+HISTORY_OVERLOAD = 0x02
+HISTORY_NET = 0x04
+HISTORY_STABLE = 0x08
+
+# Default disk budget per channel, heartbeat for unchanged readings, shortest
+# interval between two stored readings of a changing weight, and the largest
+# number of samples or buckets one /history response may carry. 256 MiB holds
+# about 11.2 million records: at one record per 0.5 s (a weight that never
+# stops changing) that is about 65 days, and an idle scale (one record per
+# second) lasts about 130 days.
+HISTORY_MAX_BYTES = 256 * 1024 * 1024
+HISTORY_HEARTBEAT = 1.0
+HISTORY_MIN_INTERVAL = 0.5
+HISTORY_MAX_POINTS = 10000
+
+
+class _HistoryTimestamps:
+    """Sequence view of the stored timestamps, oldest first (for bisect)"""
+
+    def __init__(self, store, first, count):
+        self.store = store
+        self.first = first
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.store._record(self.first + index)[0]
+
+
+class HistoryStore:
+    """Append-only ring of readings in a memory-mapped file
+
+    The file holds a small header and a fixed number of 24-byte records
+    (timestamp, weight, seq, flags), so disk usage never exceeds its budget:
+    once full, the oldest records are overwritten. Appends are plain memory
+    writes from the acquisition thread; the OS writes pages back.
+
+    Readings are decimated so the budget covers months, not days, of 20 Hz
+    frames: a reading identical to the previous stored one is kept once per
+    heartbeat, and a changing weight (motion, noise) at most once per
+    min_interval. A change of status (stable, motion, overload, net) is
+    always stored, so every settled weight is on record.
+    """
+
+    MAGIC = b'SCALEHS1'
+    HEADER = struct.Struct('<8sIIQ')
+    RECORD = struct.Struct('<ddIH2x')
+    # Header is padded so records never straddle it
+    HEADER_SIZE = 64
+
+    def __init__(self, path, max_bytes=HISTORY_MAX_BYTES, heartbeat=HISTORY_HEARTBEAT,
+                 min_interval=HISTORY_MIN_INTERVAL):
+        self.path = path
+        self.heartbeat = heartbeat
+        self.min_interval = min_interval
+        self.capacity = max(1, (max_bytes - self.HEADER_SIZE) // self.RECORD.size)
+        size = self.HEADER_SIZE + self.capacity * self.RECORD.size
+        self._file = open(path, 'a+b')
+        self._file.seek(0)
+        header = self._file.read(self.HEADER.size)
+        fresh = True
+        if len(header) == self.HEADER.size:
+            magic, record_size, capacity, _ = self.HEADER.unpack(header)
+            fresh = (magic, record_size, capacity) != (self.MAGIC, self.RECORD.size, self.capacity)
+        if fresh:
+            # New file, or the budget changed: start an empty ring
+            self._file.truncate(0)
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        if fresh:
+            self.HEADER.pack_into(self._map, 0, self.MAGIC, self.RECORD.size, self.capacity, 0)
+        self.total = self.HEADER.unpack_from(self._map, 0)[3]
+        self._last = None
+        if self.total:
+            timestamp, weight, _, flags = self._record(self.total - 1)
+            self._last = (weight, flags, timestamp)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, reading):
+        """Store a reading unless it is too soon after the previous one with the same status"""
+        flags = ((HISTORY_MOTION if reading.motion else 0) | (HISTORY_OVERLOAD if reading.overload else 0)
+                 | (HISTORY_NET if reading.net else 0) | (HISTORY_STABLE if reading.stable else 0))
+        last = self._last
+        if last and last[1] == flags:
+            interval = self.heartbeat if last[0] == reading.weight else self.min_interval
+            if reading.timestamp - last[2] < interval:
+                return
+        offset = self.HEADER_SIZE + (self.total % self.capacity) * self.RECORD.size
+        self.RECORD.pack_into(self._map, offset, reading.timestamp, reading.weight,
+                              reading.seq & 0xFFFFFFFF, flags)
+        # Publish the record by bumping the counter last
+        self.total += 1
+        struct.pack_into('<Q', self._map, 16, self.total)
+        self._last = (reading.weight, flags, reading.timestamp)
+
+    def _record(self, index):
+        return self.RECORD.unpack_from(self._map, self.HEADER_SIZE + (index % self.capacity) * self.RECORD.size)
+
+    def records(self, start, end, chunk=4096):
+        """Yield (timestamp, weight, seq, flags) with start <= timestamp < end"""
+        total = self.total
+        count = min(total, self.capacity)
+        first = total - count
+        timestamps = _HistoryTimestamps(self, first, count)
+        index = first + bisect.bisect_left(timestamps, start)
+        stop = first + bisect.bisect_left(timestamps, end, index - first)
+        size = self.RECORD.size
+        while index < stop:
+            # Unpack contiguous runs of slots, splitting where the ring wraps
+            slot = index % self.capacity
+            n = min(chunk, stop - index, self.capacity - slot)
+            offset = self.HEADER_SIZE + slot * size
+            for item in self.RECORD.iter_unpack(self._map[offset:offset + n * size]):
+                # Skip slots overwritten by the writer while we were reading
+                if start <= item[0] < end:
+                    yield item
+            index += n
+
+    def query(self, start, end, resolution=None, limit=HISTORY_MAX_POINTS):
+        """Return (points, truncated): raw samples, or min/max/avg buckets of resolution seconds"""
+        truncated = False
+        if not resolution:
+            points = []
+            for timestamp, weight, seq, flags in self.records(start, end):
+                if len(points) >= limit:
+                    truncated = True
+                    break
+                points.append({
+                    'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+                    'weight': weight,
+                    'seq': seq,
+                    'stable': bool(flags & HISTORY_STABLE),
+                    'motion': bool(flags & HISTORY_MOTION),
+                    'overload': bool(flags & HISTORY_OVERLOAD),
+                    'net': bool(flags & HISTORY_NET),
+                })
+            return points, truncated
+
+        # [bucket start, min, max, sum, count, stable count]
+        buckets = []
+        current = None
+        for timestamp, weight, _, flags in self.records(start, end):
+            # Buckets are aligned to multiples of resolution since the epoch
+            bucket = timestamp // resolution * resolution
+            if current is None or bucket != current[0]:
+                if len(buckets) >= limit:
+                    truncated = True
+                    break
+                current = [bucket, weight, weight, 0.0, 0, 0]
+                buckets.append(current)
+            if weight < current[1]:
+                current[1] = weight
+            elif weight > current[2]:
+                current[2] = weight
+            current[3] += weight
+            current[4] += 1
+            if flags & HISTORY_STABLE:
+                current[5] += 1
+        points = [{
+            'timestamp': datetime.fromtimestamp(bucket).isoformat(),
+            'min': low,
+            'max': high,
+            'avg': round(total / count, 2),
+            'count': count,
+            'stable': stable,
+        } for bucket, low, high, total, count, stable in buckets]
+        return points, truncated
+
+    def close(self):
+        try:
+            self._map.flush()
+            self._map.close()
+        finally:
+            self._file.close()
+
+
+class SimulatedSource:
+    """Random weight generator used in simulation mode
+
+    Readings are encoded in the channel's indicator protocol so that the
+    simulator exercises the same framing and decoding path as hardware.
+    """
+
+    def __init__(self, protocol, interval=1.0):
+        self.protocol = protocol
+        self.interval = interval
+        self.is_open = False
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def describe(self):
+        return "simulator"
+
+    def present(self):
+        return True
+
+    def read(self):
+        time.sleep(self.interval)
+        if random.random() > 0.5:
+            return self.protocol.encode(random.uniform(25000, 35000))
+        return self.protocol.encode(random.uniform(10000, 15000))
+
+
+class SerialSource:
+    """Raw byte source reading from a serial indicator"""
+
+    def __init__(self, port, baudrate, timeout=1):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.connection = None
+        # (vid, pid, serial number) of a USB adapter, to follow it if it is
+        # re-enumerated under another name (COM3 -> COM5, ttyUSB0 -> ttyUSB1)
+        self.usb_id = None
+
+    @property
+    def is_open(self):
+        return bool(self.connection and self.connection.is_open)
+
+    def open(self):
+        self.connection = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
+        for info in serial.tools.list_ports.comports():
+            if info.device == self.port and info.vid is not None:
+                self.usb_id = (info.vid, info.pid, info.serial_number)
+
+    def close(self):
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+        self.connection = None
+
+    def describe(self):
+        return self.port
+
+    def present(self):
+        """Whether the port is plugged in (switching to the adapter's new name if it moved)"""
+        # Device paths that are not enumerated (ptys, /dev/serial/by-id links) exist as files
+        if os.name != 'nt' and os.path.exists(self.port):
+            return True
+        ports = serial.tools.list_ports.comports()
+        if any(info.device == self.port for info in ports):
+            return True
+        if self.usb_id is not None:
+            for info in ports:
+                if (info.vid, info.pid, info.serial_number) == self.usb_id:
+                    self.port = info.device
+                    return True
+        return False
+
+    def read(self):
+        """Return whatever bytes are available (blocks up to timeout for one)"""
+        connection = self.connection
+        try:
+            return connection.read(connection.in_waiting or 1)
+        except serial.SerialException:
+            raise
+        except OSError as e:
+            # On POSIX in_waiting is a bare ioctl: an unplugged adapter gives a
+            # plain OSError (EIO) rather than a SerialException
+            raise serial.SerialException(f"{self.port}: {e}") from e
+
+
+class TruckProfileSource:
+    """Synthetic weighbridge traffic for simulation and benchmarks
+
+    Each cycle drives one truck over the platform: empty platform, approach
+    ramp, damped settling oscillation, stable plateau and exit ramp. Loaded
+    and empty trucks alternate, and readings move in indicator divisions
+    with a little noise, so stability detection and captures behave as they
+    do on a real bridge. ``speed`` compresses the profile in time (e.g. 10
+    runs a 25 s cycle in 2.5 s) without changing the frame rate.
+    """
+
+    # Phase durations in seconds at speed 1
+    IDLE_TIME = 5.0
+    RAMP_TIME = 4.0
+    SETTLE_TIME = 3.0
+    PLATEAU_TIME = 8.0
+    EXIT_TIME = 3.0
+    # Settling oscillation: initial amplitude (share of the load), decay and frequency
+    OVERSHOOT = 0.04
+    SETTLE_DECAY = 0.8
+    SETTLE_FREQUENCY = 1.5
+
+    def __init__(self, protocol, interval=0.1, speed=1.0, division=10.0, noise=3.0, seed=None):
+        self.protocol = protocol
+        self.interval = interval
+        self.speed = speed
+        self.division = division
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.is_open = False
+        self.cycle_time = self.IDLE_TIME + self.RAMP_TIME + self.SETTLE_TIME + self.PLATEAU_TIME + self.EXIT_TIME
+        self._loaded = False
+
+    def open(self):
+        self.is_open = True
+        self._started = time.monotonic()
+        self._cycle = -1
+
+    def close(self):
+        self.is_open = False
+
+    def describe(self):
+        return "truck simulator" if self.speed == 1 else f"truck simulator x{self.speed:g}"
+
+    def present(self):
+        return True
+
+    def weight_at(self, elapsed):
+        """Return (weight, motion) at profile time elapsed (seconds)"""
+        cycle, t = divmod(elapsed, self.cycle_time)
+        if cycle != self._cycle:
+            # Next truck: alternate loaded and empty vehicles
+            self._cycle = cycle
+            self._loaded = not self._loaded
+            self._load = self.random.uniform(25000, 40000) if self._loaded else self.random.uniform(10000, 15000)
+        load = self._load
+        motion = True
+        if t < self.IDLE_TIME:
+            weight, motion = 0.0, False
+        elif t < self.IDLE_TIME + self.RAMP_TIME:
+            weight = load * (t - self.IDLE_TIME) / self.RAMP_TIME
+        elif t < self.IDLE_TIME + self.RAMP_TIME + self.SETTLE_TIME:
+            settle = t - self.IDLE_TIME - self.RAMP_TIME
+            amplitude = load * self.OVERSHOOT * math.exp(-settle / self.SETTLE_DECAY)
+            weight = load + amplitude * math.cos(2 * math.pi * self.SETTLE_FREQUENCY * settle)
+        elif t < self.cycle_time - self.EXIT_TIME:
+            weight, motion = load, False
+        else:
+            weight = load * (self.cycle_time - t) / self.EXIT_TIME
+        weight += self.random.gauss(0.0, self.noise)
+        return round(weight / self.division) * self.division, motion
+
+    def read(self):
+        time.sleep(self.interval)
+        weight, motion = self.weight_at((time.monotonic() - self._started) * self.speed)
+        return self.protocol.encode(weight, motion=motion)
+
+
+# Raw serial capture files: magic, then (timestamp, length) records each
+# followed by the bytes read from the port at that time
+CAPTURE_MAGIC = b'SCALECAP'
+CAPTURE_RECORD = struct.Struct('<dI')
+
+
+class SerialCapture:
+    """Append raw bytes read from an indicator to a capture file for replay"""
+
+    # Flush to disk at most this often (seconds)
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(CAPTURE_MAGIC)
+        self._flushed_at = time.monotonic()
+
+    def write(self, data, timestamp=None):
+        self._file.write(CAPTURE_RECORD.pack(time.time() if timestamp is None else timestamp, len(data)))
+        self._file.write(data)
+        now = time.monotonic()
+        if now - self._flushed_at >= self.FLUSH_INTERVAL:
+            self._file.flush()
+            self._flushed_at = now
+
+    def close(self):
+        self._file.close()
+
+
+def read_capture(path):
+    """Yield (timestamp, data) records from a capture file"""
+    with open(path, 'rb') as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a serial capture file")
+        while True:
+            header = f.read(CAPTURE_RECORD.size)
+            if len(header) < CAPTURE_RECORD.size:
+                return
+            timestamp, length = CAPTURE_RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                # Truncated by a crash while recording
+                return
+            yield timestamp, data
+
+
+class ReplaySource:
+    """Feed a serial capture back with its original timing
+
+    ``speed`` scales the recorded gaps (2 replays twice as fast, 0 as fast
+    as possible). The capture restarts from the beginning when ``loop`` is
+    set, otherwise the source goes quiet at the end.
+    """
+
+    # Pause (seconds, at speed 1) before the capture starts over
+    LOOP_GAP = 1.0
+
+    def __init__(self, path, speed=1.0, loop=True):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.is_open = False
+        self._records = None
+
+    def open(self):
+        self._records = read_capture(self.path)
+        self._previous = None
+        self.is_open = True
+
+    def close(self):
+        if self._records is not None:
+            self._records.close()
+            self._records = None
+        self.is_open = False
+
+    def describe(self):
+        return f"replay of {os.path.basename(self.path)} x{self.speed:g}"
+
+    def present(self):
+        return os.path.exists(self.path)
+
+    def read(self):
+        record = next(self._records, None)
+        if record is None:
+            if not self.loop:
+                time.sleep(0.5)
+                return b''
+            self._records.close()
+            self._records = read_capture(self.path)
+            self._previous = None
+            if self.speed > 0:
+                time.sleep(self.LOOP_GAP / self.speed)
+            record = next(self._records, None)
+            if record is None:
+                time.sleep(0.5)
+                return b''
+        timestamp, data = record
+        if self._previous is not None and self.speed > 0:
+            time.sleep(max(0.0, timestamp - self._previous) / self.speed)
+        self._previous = timestamp
+        return data
+
+
+class WeightAcquisition(threading.Thread):
+    """Background thread draining a weight source into a ring buffer
+
+    Every reading is appended to a bounded deque and published as the
+    ``latest`` snapshot. Consumers (Flask routes, the GUI) only ever read
+    ``latest`` and never touch the serial port themselves.
+    """
+
+    # Reconnect backoff bounds (seconds), how often a missing port is looked
+    # for, and how long a silent connection may last before its port is checked
+    RECONNECT_DELAY = 1.0
+    RECONNECT_MAX_DELAY = 30.0
+    PORT_SCAN_INTERVAL = 1.0
+    SILENT_TIMEOUT = 5.0
+    # Malformed frames are summarised at most this often instead of per line
+    FRAME_ERROR_LOG_INTERVAL = 30.0
+
+    def __init__(self, source, protocol, log, stability=None, broadcaster=None, buffer_size=1200,
+                 history=None, capture=None, recorder=None, filters=None, channel_id=None,
+                 udp=None, name="weight-acquisition"):
+        super().__init__(name=name, daemon=True)
+        self.source = source
+        self.protocol = protocol
+        self.splitter = protocol.create_splitter()
+        self.log = log
+        self.stability = stability or StabilityDetector()
+        self.broadcaster = broadcaster if broadcaster is not None else ReadingBroadcaster()
+        self.buffer = deque(maxlen=buffer_size)
+        self.history = history
+        # Called with each reading that newly became stable
+        self.capture = capture
+        # Optional SerialCapture receiving every raw chunk read
+        self.recorder = recorder
+        # Optional FilterChain smoothing weights before stability detection
+        self.filters = filters
+        # Optional callable sending every reading as a UDP datagram
+        self.udp = udp
+        self.metric_labels = (('scale', channel_id),) if channel_id else ()
+        self._unstable_since = None
+        self.latest = EMPTY_READING
+        # "connecting", "connected", "disconnected" or "stopped"
+        self.state = "connecting"
+        self.connected_at = None
+        self._last_data = self._last_scan = 0.0
+        self._seq = 0
+        self._stop_event = threading.Event()
+        # Only used to wake up waiters (?wait_stable); plain reads stay lock-free
+        self._changed = threading.Condition()
+        self.frame_errors = {}
+        self._pending_frame_errors = {}
+        self._frame_error_logged_at = 0.0
+
+    def run(self):
+        failures = 0
+        while not self._stop_event.is_set():
+            if not self.source.is_open:
+                try:
+                    self.source.open()
+                except Exception as e:
+                    failures += 1
+                    self.state = "disconnected"
+                    self._wait_reconnect(failures, e)
+                    continue
+                if failures:
+                    self.log(f"Reconnected to {self.source.describe()} after {failures} failed attempt(s)", "SUCCESS")
+                else:
+                    self.log(f"Connected to {self.source.describe()}", "SUCCESS")
+                failures = 0
+                self.connected_at = time.time()
+                self.state = "connected"
+                self.splitter.reset()
+                METRICS.inc('scale_source_connects_total', self.metric_labels)
+                self._last_data = self._last_scan = time.monotonic()
+
+            try:
+                data = self.source.read()
+            except serial.SerialException as e:
+                METRICS.inc('scale_source_errors_total', self.metric_labels)
+                self.log(f"Serial error: {e}", "ERROR")
+                self._disconnect()
+                failures = 1
+                self._wait_reconnect(failures, e, logged=True)
+                continue
+            except Exception as e:
+                self.log(f"Error reading weight: {e}", "WARNING")
+                # Do not spin on a persistent failure (e.g. missing replay file)
+                self._stop_event.wait(self.RECONNECT_DELAY)
+                continue
+
+            now = time.monotonic()
+            if data:
+                self._last_data = now
+                METRICS.inc('scale_bytes_total', self.metric_labels, len(data))
+                if self.recorder is not None:
+                    self.recorder.write(data)
+                self.process(data)
+            elif now - self._last_data >= self.SILENT_TIMEOUT and now - self._last_scan >= self.PORT_SCAN_INTERVAL:
+                # Some USB adapters vanish without a read error: check the port still exists
+                self._last_scan = now
+                if not self.source.present():
+                    METRICS.inc('scale_source_errors_total', self.metric_labels)
+                    self.log(f"{self.source.describe()} disappeared", "ERROR")
+                    self._disconnect()
+                    failures = 1
+                    self._wait_reconnect(failures, None, logged=True)
+
+        self._close_source()
+        self.state = "stopped"
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _disconnect(self):
+        self._close_source()
+        self.stability.reset()
+        if self.filters is not None:
+            self.filters.reset()
+        self.state = "disconnected"
+
+    def _wait_reconnect(self, failures, error, logged=False):
+        """Sleep a jittered exponential backoff, cut short if the port reappears"""
+        delay = min(self.RECONNECT_MAX_DELAY, self.RECONNECT_DELAY * 2 ** (failures - 1))
+        delay = random.uniform(delay / 2, delay)
+        # Log attempts 1, 2, 4, 8... rather than an error line per retry
+        if not logged and failures & (failures - 1) == 0:
+            self.log(f"Cannot open {self.source.describe()} ({error}), attempt {failures}, "
+                     f"retrying in {delay:.1f} s", "ERROR" if failures == 1 else "WARNING")
+        present = self.source.present()
+        deadline = time.monotonic() + delay
+        while not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._stop_event.wait(min(self.PORT_SCAN_INTERVAL, remaining))
+            if not present and self.source.present():
+                self.log(f"{self.source.describe()} plugged in again", "INFO")
+                return
+
+    def process(self, data):
+        """Split raw bytes into frames, decode and publish them"""
+        decode = self.protocol.decode
+        frames = self.splitter.feed(data)
+        if frames:
+            METRICS.inc('scale_frames_total', self.metric_labels, len(frames))
+        for frame in frames:
+            try:
+                decoded = decode(frame)
+            except FrameError as e:
+                self._frame_error(e)
+                continue
+            self.publish(decoded)
+
+    def _frame_error(self, error):
+        METRICS.inc('scale_frame_errors_total', self.metric_labels + (('reason', error.reason),))
+        self.frame_errors[error.reason] = self.frame_errors.get(error.reason, 0) + 1
+        pending = self._pending_frame_errors
+        pending[error.reason] = pending.get(error.reason, 0) + 1
+        now = time.monotonic()
+        if now - self._frame_error_logged_at >= self.FRAME_ERROR_LOG_INTERVAL:
+            summary = ", ".join(f"{reason}={count}" for reason, count in pending.items())
+            self.log(f"Ignored {sum(pending.values())} malformed frame(s) ({summary}), last: {error}", "WARNING")
+            pending.clear()
+            self._frame_error_logged_at = now
+
+    def publish(self, decoded):
+        """Store a decoded frame and make it the latest snapshot"""
+        self._seq += 1
+        if decoded.weight is None:
+            # Status-only frame (e.g. overload): keep the last weight
+            weight, raw_weight = self.latest.weight, self.latest.raw_weight
+        else:
+            raw_weight = round(decoded.weight, 2)
+            weight = round(self.filters.apply(raw_weight), 2) if self.filters is not None else raw_weight
+        timestamp = time.time()
+        stable, stable_weight = self.stability.update(weight, timestamp)
+        if decoded.motion or decoded.overload:
+            stable, stable_weight = False, None
+        reading = WeightReading(weight, timestamp, self._seq, stable, stable_weight,
+                                decoded.unit, decoded.motion, decoded.overload, decoded.net, raw_weight)
+        self.buffer.append(reading)
+        if self.history is not None:
+            self.history.append(reading)
+        settled = stable and not self.latest.stable
+        if not stable:
+            if self._unstable_since is None:
+                self._unstable_since = timestamp
+        elif settled and self._unstable_since is not None:
+            METRICS.observe('scale_stability_seconds', timestamp - self._unstable_since, self.metric_labels)
+            self._unstable_since = None
+        if self.capture is not None:
+            # Every reading, so the pusher sees the platform being cleared
+            self.capture(reading, settled)
+        # Single reference assignment: atomic for concurrent readers
+        self.latest = reading
+        with self._changed:
+            self._changed.notify_all()
+        self.broadcaster.publish(reading)
+        if self.udp is not None:
+            self.udp(reading)
+
+    def wait_for(self, predicate, timeout):
+        """Block until predicate(latest) holds or timeout; return latest"""
+        reading = self.latest
+        if predicate(reading):
+            return reading
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while not predicate(self.latest) and not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        return self.latest
+
+    def wait_stable(self, timeout):
+        return self.wait_for(lambda reading: reading.stable, timeout)
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        with self._changed:
+            self._changed.notify_all()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def _close_source(self):
+        try:
+            if self.source.is_open:
+                self.source.close()
+                self.log(f"Closed {self.source.describe()}", "INFO")
+        except Exception as e:
+            self.log(f"Error closing {self.source.describe()}: {e}", "WARNING")
+
+
+class ScaleChannel:
+    """One weighbridge served by this process
+
+    A channel bundles its own source settings (mode, serial port, baud rate,
+    simulation interval), acquisition thread and stream subscribers, so a
+    single server can front several indicators on one gatehouse PC.
+    """
+
+    def __init__(self, channel_id, name=None, mode="simulation", serial_port="COM3",
+                 baudrate=9600, protocol="generic", pattern=None, decimal_mark=None, simulation_interval=1.0,
+                 simulation_profile="truck", replay_file=None, speed=1.0, capture_file=None, filters=None):
+        self.channel_id = channel_id
+        self.name = name or channel_id
+        self.mode = mode
+        self.serial_port = serial_port
+        self.baudrate = baudrate
+        self.protocol = protocol
+        self.pattern = pattern
+        # Generic protocol: "." or "," to stop guessing the decimal mark
+        self.decimal_mark = decimal_mark
+        self.simulation_interval = simulation_interval
+        # "truck" (TruckProfileSource) or "random" (SimulatedSource)
+        self.simulation_profile = simulation_profile
+        self.replay_file = replay_file
+        # Time factor of the truck profile and of replays
+        self.speed = speed
+        self.capture_file = capture_file
+        # Filter specs, e.g. [{"type": "median", "size": 5}, {"type": "graduation", "division": 10}]
+        self.filters = filters or []
+        self.broadcaster = ReadingBroadcaster()
+        self.history = None
+        self.acquisition = None
+        # Start time (ms) of the current acquisition, distinguishing its seq numbers
+        self.epoch = 0
+
+    @classmethod
+    def from_config(cls, data):
+        return cls(data['id'], name=data.get('name'), mode=data.get('mode', "simulation"),
+                   serial_port=data.get('serial_port', "COM3"), baudrate=data.get('baudrate', 9600),
+                   protocol=data.get('protocol', "generic"), pattern=data.get('pattern'),
+                   decimal_mark=data.get('decimal_mark'), simulation_interval=data.get('simulation_interval', 1.0),
+                   simulation_profile=data.get('simulation_profile', "truck"),
+                   replay_file=data.get('replay_file'), speed=data.get('speed', 1.0),
+                   capture_file=data.get('capture_file'), filters=data.get('filters'))
+
+    def to_config(self):
+        return {
+            'id': self.channel_id,
+            'name': self.name,
+            'mode': self.mode,
+            'serial_port': self.serial_port,
+            'baudrate': self.baudrate,
+            'protocol': self.protocol,
+            'pattern': self.pattern,
+            'decimal_mark': self.decimal_mark,
+            'simulation_interval': self.simulation_interval,
+            'simulation_profile': self.simulation_profile,
+            'replay_file': self.replay_file,
+            'speed': self.speed,
+            'capture_file': self.capture_file,
+            'filters': self.filters,
+        }
+
+    @property
+    def running(self):
+        return self.acquisition is not None
+
+    @property
+    def latest(self):
+        acquisition = self.acquisition
+        return acquisition.latest if acquisition else EMPTY_READING
+
+    @property
+    def source_state(self):
+        """Acquisition state, "stale" when connected but silent for READING_STALE_AFTER"""
+        acquisition = self.acquisition
+        if acquisition is None:
+            return "stopped"
+        state = acquisition.state
+        if state == "connected":
+            last = acquisition.latest.timestamp or acquisition.connected_at
+            if time.time() - last > READING_STALE_AFTER:
+                return "stale"
+        return state
+
+    def describe(self):
+        if self.mode == "simulation":
+            return f"{self.channel_id}: SIMULATION {self.simulation_profile} ({self.protocol})"
+        if self.mode == "replay":
+            return f"{self.channel_id}: REPLAY {self.replay_file} x{self.speed:g} ({self.protocol})"
+        return f"{self.channel_id}: {self.serial_port} @ {self.baudrate} ({self.protocol})"
+
+    def create_source(self, protocol):
+        """Build the weight source for this channel's operating mode"""
+        if self.mode == "simulation":
+            if self.simulation_profile == "random":
+                return SimulatedSource(protocol, self.simulation_interval)
+            return TruckProfileSource(protocol, self.simulation_interval, speed=self.speed)
+        if self.mode == "replay":
+            return ReplaySource(self.replay_file, speed=self.speed)
+        return SerialSource(self.serial_port, self.baudrate, timeout=1)
+
+    def start(self, log, stability, capture=None, udp=None):
+        def channel_log(message, level="INFO"):
+            log(f"[{self.channel_id}] {message}", level)
+
+        protocol = create_protocol(self.protocol, self.pattern, self.decimal_mark)
+        filters = create_filter_chain(self.filters)
+        if filters is not None:
+            channel_log(f"Filtering readings: {filters.describe()}", "INFO")
+        self.epoch = int(time.time() * 1000)
+        self.acquisition = WeightAcquisition(self.create_source(protocol), protocol, channel_log,
+                                             stability=stability, broadcaster=self.broadcaster,
+                                             history=self.history, filters=filters, channel_id=self.channel_id,
+                                             name=f"weight-acquisition-{self.channel_id}",
+                                             udp=udp.sender(self.channel_id) if udp else None,
+                                             capture=functools.partial(capture, self.channel_id) if capture else None,
+                                             recorder=SerialCapture(self.capture_file) if self.capture_file else None)
+        self.acquisition.start()
+
+    def stop(self):
+        # Let open streams finish
+        self.broadcaster.wake_all()
+        if self.acquisition:
+            self.acquisition.stop()
+            self.acquisition = None
+
+    def wait_for(self, predicate, timeout):
+        acquisition = self.acquisition
+        return acquisition.wait_for(predicate, timeout) if acquisition else EMPTY_READING
+
+    def wait_stable(self, timeout):
+        acquisition = self.acquisition
+        return acquisition.wait_stable(timeout) if acquisition else EMPTY_READING
+
+    def etag(self, reading):
+        """Entity tag of a reading; seq restarts with acquisition, hence the epoch
+
+        The source state is part of it so a reading going stale is not a 304.
+        """
+        return f'"{self.channel_id}-{self.epoch:x}-{reading.seq}-{self.source_state}"'
+
+    def info(self):
+        """Channel description for /scales"""
+        return {
+            'id': self.channel_id,
+            'name': self.name,
+            'mode': self.mode,
+            'serial_port': self.serial_port if self.mode == "hardware" else None,
+            'baudrate': self.baudrate if self.mode == "hardware" else None,
+            'protocol': self.protocol,
+            'filters': self.filters,
+            'running': self.running,
+            'subscribers': len(self.broadcaster),
+        }
+
+
+# HTTP serving defaults: worker threads, connections allowed to queue for a
+# worker, idle/slow-client socket timeout and the share of workers that
+# long-lived event streams may occupy
+HTTP_WORKERS = 32
+HTTP_BACKLOG = 64
+HTTP_REQUEST_TIMEOUT = 15.0
+MAX_STREAMS = 16
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1 handler with persistent connections and a socket timeout
+
+    Werkzeug's handler always answers ``Connection: close``. This one keeps
+    the connection open for bodyless requests (all weight polling) and
+    frames responses with Content-Length or chunked encoding. The socket
+    ``timeout`` bounds both slow requests and idle keep-alive connections.
+    Per-request access logging is left to the application.
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = HTTP_REQUEST_TIMEOUT
+    # Headers and body are separate small writes; without TCP_NODELAY the
+    # second one waits for the client's delayed ACK on a kept-alive socket
+    disable_nagle_algorithm = True
+
+    def run_wsgi(self):
+        if self.headers.get("Expect", "").lower().strip() == "100-continue":
+            self.wfile.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        environ = self.environ = self.make_environ()
+        if self.headers.get("Content-Length", "0").strip() not in ("", "0") or "Transfer-Encoding" in self.headers:
+            # Request bodies are not drained, so the connection cannot be reused
+            self.close_connection = True
+
+        response = {'status': None, 'headers': None, 'sent': False, 'chunked': False}
+
+        def write(data):
+            if not response['sent']:
+                response['sent'] = True
+                code, _, message = response['status'].partition(" ")
+                code = int(code)
+                self.send_response(code, message)
+                header_keys = set()
+                for key, value in response['headers']:
+                    self.send_header(key, value)
+                    header_keys.add(key.lower())
+                if not ("content-length" in header_keys or environ["REQUEST_METHOD"] == "HEAD"
+                        or 100 <= code < 200 or code in (204, 304)):
+                    if self.request_version >= "HTTP/1.1":
+                        response['chunked'] = True
+                        self.send_header("Transfer-Encoding", "chunked")
+                    else:
+                        self.close_connection = True
+                if self.close_connection:
+                    self.send_header("Connection", "close")
+                self.end_headers()
+            if data:
+                if response['chunked']:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                else:
+                    self.wfile.write(data)
+            self.wfile.flush()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response['sent']:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = status
+            response['headers'] = headers
+            return write
+
+        try:
+            application_iter = self.server.app(environ, start_response)
+            try:
+                for data in application_iter:
+                    write(data)
+                if not response['sent']:
+                    write(b"")
+                if response['chunked']:
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+            finally:
+                if hasattr(application_iter, "close"):
+                    application_iter.close()
+        except (ConnectionError, socket.timeout) as e:
+            self.close_connection = True
+            self.connection_dropped(e, environ)
+        except Exception as e:
+            self.close_connection = True
+            self.log_error("Error on request %s: %r", self.path, e)
+            if not response['sent']:
+                self.send_error(500)
+
+    def log_request(self, code="-", size="-"):
+        pass
+
+    def log_error(self, format, *args):
+        # Idle keep-alive connections expiring are routine, not errors
+        if not format.startswith("Request timed out"):
+            super().log_error(format, *args)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server dispatching connections to a bounded thread pool
+
+    Werkzeug's development server is single threaded, and its threaded
+    variant spawns an unbounded thread per connection. Here at most
+    ``workers`` connections are served concurrently and ``backlog`` more
+    may wait for a worker; beyond that clients get an immediate 503.
+    """
+
+    multithread = True
+    daemon_threads = True
+
+    def __init__(self, host, port, app, workers=HTTP_WORKERS, backlog=HTTP_BACKLOG,
+                 request_timeout=HTTP_REQUEST_TIMEOUT):
+        handler = type("ScaleRequestHandler", (KeepAliveRequestHandler,), {'timeout': request_timeout})
+        super().__init__(host, port, app, handler=handler)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        with self._connections_lock:
+            self._connections.add(request)
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(request)
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def _reject(self, request):
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\n"
+                            b"Content-Length: 0\r\nConnection: close\r\nRetry-After: 1\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # Wake workers parked on idle keep-alive connections
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Logging pipeline limits
+LOG_QUEUE_SIZE = 10000
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_RETENTION_DAYS = 30
+REQUEST_LOG_INTERVAL = 60
+
+
+class DailyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Log file named after the current day, also rotated by size
+
+    Writes to ``<prefix>_YYYYMMDD.log``; at midnight it switches to the new
+    day's file and within a day it rolls over to ``.1``, ``.2``... once
+    ``maxBytes`` is reached. Day files older than ``retention_days`` are
+    deleted when the day changes.
+    """
+
+    def __init__(self, log_dir, prefix, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                 retention_days=LOG_RETENTION_DAYS):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.retention_days = retention_days
+        self.day = datetime.now().strftime("%Y%m%d")
+        super().__init__(self._day_file(self.day), maxBytes=maxBytes, backupCount=backupCount,
+                         encoding='utf-8', delay=True)
+
+    def _day_file(self, day):
+        return os.path.join(self.log_dir, f"{self.prefix}_{day}.log")
+
+    def shouldRollover(self, record):
+        return self._today() != self.day or super().shouldRollover(record)
+
+    def doRollover(self):
+        today = self._today()
+        if today == self.day:
+            super().doRollover()
+            return
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.day = today
+        self.baseFilename = os.path.abspath(self._day_file(today))
+        self._purge_old_files()
+
+    def _today(self):
+        return datetime.now().strftime("%Y%m%d")
+
+    def _purge_old_files(self):
+        cutoff = time.time() - self.retention_days * 86400
+        for filename in os.listdir(self.log_dir):
+            path = os.path.join(self.log_dir, filename)
+            if filename.startswith(f"{self.prefix}_") and os.path.getmtime(path) < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer lags"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogAggregator:
+    """Summarise weight requests per client instead of logging each one
+
+    A client's first request is logged immediately; afterwards request
+    counts are reported once per ``interval`` seconds.
+    """
+
+    def __init__(self, log, interval=REQUEST_LOG_INTERVAL):
+        self.log = log
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._known_clients = set()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def record(self, client, channel_id):
+        with self._lock:
+            per_channel = self._counts.setdefault(client, {})
+            per_channel[channel_id] = per_channel.get(channel_id, 0) + 1
+            first = client not in self._known_clients
+            if first:
+                self._known_clients.add(client)
+        if first:
+            self.log(f"New client {client} polling {channel_id}", "WEIGHT")
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        for client, per_channel in counts.items():
+            total = sum(per_channel.values())
+            detail = ", ".join(f"{channel_id}: {count}" for channel_id, count in per_channel.items())
+            self.log(f"{total} request(s) from {client} in last {self.interval} s ({detail})", "WEIGHT")
+
+
+# ---------------------------------------------------------------------------
+# Push to Odoo
+# ---------------------------------------------------------------------------
+
+# Outbox delivery: captures per request, HTTP timeout and the retry delay
+# bounds (seconds) of the exponential backoff
+PUSH_BATCH_SIZE = 50
+# Stable weights below this (kg) are an empty platform, not a capture
+PUSH_MIN_WEIGHT = 100.0
+# A capture within this many kg of the channel's previous one, less than
+# PUSH_REPEAT_WINDOW seconds later, is the same truck settling again, not a
+# new weighing (0 disables the check)
+PUSH_REPEAT_TOLERANCE = 20.0
+PUSH_REPEAT_WINDOW = 300.0
+PUSH_TIMEOUT = 10.0
+PUSH_MIN_BACKOFF = 1.0
+PUSH_MAX_BACKOFF = 300.0
+
+
+class PushOutbox:
+    """Durable queue of stable captures waiting to be delivered to Odoo
+
+    Captures are committed to SQLite before delivery is attempted and only
+    deleted once Odoo has acknowledged them, so they survive gateway
+    restarts and long WAN outages. Each capture carries an idempotency key,
+    letting Odoo discard a batch it already applied but failed to confirm.
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL UNIQUE,
+                scale TEXT NOT NULL,
+                weight REAL NOT NULL,
+                timestamp REAL NOT NULL,
+                seq INTEGER NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )""")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """One explicit transaction (and one fsync) for a batch of statements
+
+        The connection is in autocommit mode, where ``with connection``
+        never opens a transaction and every statement would commit (and
+        fsync) on its own.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def add(self, captures):
+        """Persist (key, scale, weight, timestamp, seq) tuples in one transaction"""
+        with self._transaction() as db:
+            db.executemany("INSERT OR IGNORE INTO outbox (key, scale, weight, timestamp, seq) "
+                           "VALUES (?, ?, ?, ?, ?)", captures)
+
+    def peek(self, limit):
+        """Oldest pending captures, in capture order"""
+        with self._lock:
+            return self._db.execute("SELECT key, scale, weight, timestamp, seq FROM outbox "
+                                    "ORDER BY id LIMIT ?", (limit,)).fetchall()
+
+    def remove(self, keys):
+        with self._transaction() as db:
+            db.executemany("DELETE FROM outbox WHERE key = ?", [(key,) for key in keys])
+
+    def failed(self, keys):
+        with self._transaction() as db:
+            db.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE key = ?",
+                           [(key,) for key in keys])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class OdooPusher(threading.Thread):
+    """Deliver stable captures from the outbox to Odoo's /scale/receive_weight
+
+    Acquisition threads only hand captures over through an in-memory queue;
+    this thread persists them and posts batches, backing off exponentially
+    (with jitter) while Odoo is unreachable. A batch is removed from the
+    outbox once Odoo answers with per-capture results, including captures
+    Odoo rejected (e.g. no open weighing), which are logged, not retried.
+    """
+
+    def __init__(self, outbox, url, log, token=None, min_weight=PUSH_MIN_WEIGHT,
+                 repeat_tolerance=PUSH_REPEAT_TOLERANCE, batch_size=PUSH_BATCH_SIZE,
+                 timeout=PUSH_TIMEOUT, max_backoff=PUSH_MAX_BACKOFF):
+        super().__init__(name="odoo-push", daemon=True)
+        self.outbox = outbox
+        self.url = url
+        self.log = log
+        self.token = token
+        self.min_weight = min_weight
+        self.repeat_tolerance = repeat_tolerance
+        # Per channel: whether the next settled weight is a capture, and the last capture
+        self._armed = {}
+        self._last_capture = {}
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_error = None
+        self.next_attempt = 0.0
+        self._captures = queue.Queue()
+        self._stop_event = threading.Event()
+
+    def capture(self, channel_id, reading, settled):
+        """Queue a stable capture; called from acquisition threads with every reading
+
+        settled is True for the reading that ends a motion. One truck gives
+        one capture: after a capture the channel stays disarmed until the
+        weight drops below min_weight (the platform was cleared), so a truck
+        that rocks and settles again is not pushed twice. A capture within
+        repeat_tolerance of the channel's previous one, within
+        PUSH_REPEAT_WINDOW, is dropped as well (the same truck back on the
+        deck).
+        """
+        if reading.weight < self.min_weight:
+            self._armed[channel_id] = True
+            return
+        if not settled or not self._armed.get(channel_id, True):
+            return
+        weight = reading.stable_weight
+        previous, previous_at = self._last_capture.get(channel_id, (None, 0.0))
+        if (previous is not None and abs(weight - previous) <= self.repeat_tolerance
+                and reading.timestamp - previous_at < PUSH_REPEAT_WINDOW):
+            self.log(f"[{channel_id}] Ignoring capture of {weight:,.2f} kg: within "
+                     f"{self.repeat_tolerance:g} kg of the previous capture", "WARNING")
+            self._armed[channel_id] = False
+            return
+        self._armed[channel_id] = False
+        self._last_capture[channel_id] = (weight, reading.timestamp)
+        self._captures.put((uuid.uuid4().hex, channel_id, weight, reading.timestamp, reading.seq))
+
+    def run(self):
+        first = None
+        while not self._stop_event.is_set():
+            self._store_captures(first)
+            first = None
+            delay = self.next_attempt - time.monotonic()
+            if delay <= 0:
+                batch = self.outbox.peek(self.batch_size)
+                if not batch:
+                    delay = None
+                elif self.deliver(batch):
+                    # More may be waiting; go round again straight away
+                    continue
+                else:
+                    delay = self.next_attempt - time.monotonic()
+            try:
+                # Sleep until the retry is due, waking early for new captures
+                first = self._captures.get(timeout=delay)
+            except queue.Empty:
+                pass
+        self._store_captures(first)
+
+    def _store_captures(self, first=None):
+        captures = [first] if first is not None else []
+        while True:
+            try:
+                item = self._captures.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                captures.append(item)
+        if captures:
+            self.outbox.add(captures)
+
+    def deliver(self, batch):
+        """Post one batch; return True once Odoo has acknowledged it"""
+        body = json.dumps({'readings': [{
+            'key': key,
+            'scale': scale,
+            'weight': weight,
+            'timestamp': datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+            'seq': seq,
+        } for key, scale, weight, timestamp, seq in batch]}).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['X-Scale-Token'] = self.token
+        keys = [row[0] for row in batch]
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url, body, headers, method='POST'),
+                                        timeout=self.timeout) as response:
+                result = json.loads(response.read().decode('utf-8'))
+            if 'results' not in result:
+                raise ValueError(result.get('error') or "unexpected response")
+        except Exception as e:
+            self.outbox.failed(keys)
+            self.failures += 1
+            backoff = min(self.max_backoff, PUSH_MIN_BACKOFF * 2 ** (self.failures - 1))
+            backoff *= random.uniform(0.5, 1.0)
+            self.next_attempt = time.monotonic() + backoff
+            if self.last_error != str(e):
+                self.log(f"Push to Odoo failed ({len(keys)} pending capture(s)): {e}", "WARNING")
+            self.last_error = str(e)
+            return False
+
+        if self.failures:
+            self.log(f"Push to Odoo recovered after {self.failures} failed attempt(s)", "SUCCESS")
+        self.failures = 0
+        self.last_error = None
+        self.next_attempt = 0.0
+        self.outbox.remove(keys)
+        for item in result['results']:
+            if item.get('success'):
+                self.log(f"[{item.get('scale')}] Odoo: {item.get('message')}", "SUCCESS")
+            else:
+                self.log(f"[{item.get('scale')}] Odoo rejected capture: {item.get('error')}", "WARNING")
+        return True
+
+    def status(self):
+        return {
+            'url': self.url,
+            'pending': len(self.outbox),
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'retry_in': round(max(0.0, self.next_attempt - time.monotonic()), 1) if self.failures else None,
+        }
+
+    def stop(self, timeout=PUSH_TIMEOUT + 1):
+        self._stop_event.set()
+        self._captures.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+
+# ---------------------------------------------------------------------------
+# Server engine
+# ---------------------------------------------------------------------------
+
+DEFAULT_CONFIG = {
+    'server_port': 5000,
+    'http_workers': HTTP_WORKERS,
+    'http_backlog': HTTP_BACKLOG,
+    'http_request_timeout': HTTP_REQUEST_TIMEOUT,
+    'max_streams': MAX_STREAMS,
+    'log_dir': 'logs',
+    'history_dir': 'history',
+    'history_mb': HISTORY_MAX_BYTES // (1024 * 1024),
+    'history_interval': HISTORY_MIN_INTERVAL,
+    'stability': {'window': 1.0, 'max_deviation': 20.0, 'min_duration': 2.0},
+    # Push stable captures to Odoo, e.g. url https://odoo.example.com/scale/receive_weight
+    'push': {'url': '', 'token': '', 'min_weight': PUSH_MIN_WEIGHT, 'repeat_tolerance': PUSH_REPEAT_TOLERANCE,
+             'outbox': 'outbox.db'},
+    # Publish every reading as a UDP datagram, e.g. group 239.255.70.1 (empty: off)
+    'udp': {'group': '', 'port': 5005, 'ttl': 1, 'interface': ''},
+    'channels': [{'id': 'scale1'}],
+    # GUI only: start serving on launch (headless mode always does)
+    'auto_start': True,
+}
+
+DEFAULT_CONFIG_FILE = os.path.join(APP_DIR, 'scale_server.json')
+
+
+def load_config(path):
+    """Return DEFAULT_CONFIG overlaid with the JSON file at path, if it exists"""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for section in ('stability', 'push', 'udp'):
+            config[section].update(data.pop(section, {}))
+        config.update(data)
+    return config
+
+
+def save_config(path, config):
+    """Write config as JSON to path atomically (a crash leaves the old file intact)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.scale_server-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def parse_time(value, default):
+    """Parse a query timestamp given as epoch seconds or ISO 8601"""
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def get_local_ip():
+    """Get local machine IP address"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except:
+        return "127.0.0.1"
+
+
+class ScaleServer:
+    """Acquisition and HTTP engine, independent of any user interface
+
+    Owns the scale channels, the logging pipeline and the Flask app. The Tk
+    window (ScaleWeightApp) is an optional front-end; headless gateways run
+    this class on its own.
+    """
+
+    def __init__(self, config=None, config_path=None):
+        config = config or load_config(None)
+        # Kept so to_config() round-trips keys this class does not manage
+        self.config = copy.deepcopy(config)
+        self.config_path = config_path
+        self.auto_start = config['auto_start']
+        self.server_port = config['server_port']
+        self.http_workers = config['http_workers']
+        self.http_backlog = config['http_backlog']
+        self.http_request_timeout = config['http_request_timeout']
+        self.max_streams = config['max_streams']
+        self.history_dir = os.path.join(APP_DIR, config['history_dir'])
+        self.history_bytes = int(config['history_mb'] * 1024 * 1024)
+        self.history_interval = float(config['history_interval'])
+        self.stability = dict(config['stability'])
+        self.push = dict(config['push'])
+        self.pusher = None
+        self.udp = dict(config['udp'])
+        self.udp_publisher = None
+        self.channels = {}
+        for channel_config in config['channels']:
+            channel = ScaleChannel.from_config(channel_config)
+            self.channels[channel.channel_id] = channel
+        self.running = False
+        self.http_server = None
+        self.server_thread = None
+        self._local_ip = None
+        self._history_lock = threading.Lock()
+        # Callables receiving (message, level) for every log entry (e.g. the GUI)
+        self.log_listeners = []
+        
+        # Logging setup (before Flask)
+        self.setup_logging(os.path.join(APP_DIR, config['log_dir']))
+        
+        # Flask app
+        self.app = Flask(__name__)
+        self.setup_flask_routes()
+    
+    @property
+    def local_ip(self):
+        """Local IP address, probed on first use rather than at startup"""
+        if self._local_ip is None:
+            self._local_ip = get_local_ip()
+        return self._local_ip
+    
+    def to_config(self):
+        """Current settings in load_config() form"""
+        config = copy.deepcopy(self.config)
+        config.update({
+            'server_port': self.server_port,
+            'stability': dict(self.stability),
+            'auto_start': self.auto_start,
+            'channels': [channel.to_config() for channel in self.channels.values()],
+        })
+        return config
+    
+    def save_config(self):
+        """Persist the current settings to config_path; returns False on failure"""
+        if not self.config_path:
+            return False
+        try:
+            save_config(self.config_path, self.to_config())
+        except (OSError, TypeError, ValueError) as e:
+            self.log(f"Failed to save configuration to {self.config_path}: {e}", "WARNING")
+            return False
+        return True
+    
+    def setup_logging(self, log_dir):
+        """Setup the queued file logging pipeline"""
+        os.makedirs(log_dir, exist_ok=True)
+        
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        file_handler = DailyRotatingFileHandler(log_dir, 'scale_server')
+        file_handler.setFormatter(formatter)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        
+        # Callers only enqueue; a background listener does the (slow) writes
+        self.log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        self.log_queue_handler = BoundedQueueHandler(self.log_queue)
+        # Records are formatted once, by the listener's handlers
+        self.log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        self.log_listener = logging.handlers.QueueListener(self.log_queue, file_handler, stream_handler)
+        self.log_listener.start()
+        
+        logging.basicConfig(level=logging.INFO, handlers=[self.log_queue_handler], force=True)
+        self.logger = logging.getLogger(__name__)
+        
+        self.request_log = RequestLogAggregator(self.log)
+    
+    def log(self, message, level="INFO"):
+        """Log to the file queue and notify listeners (callable from any thread)"""
+        # Log to file
+        if level == "ERROR":
+            self.logger.error(message)
+        elif level == "WARNING":
+            self.logger.warning(message)
+        elif level == "SUCCESS":
+            self.logger.info(f"✓ {message}")
+        else:
+            self.logger.info(message)
+        
+        for listener in self.log_listeners:
+            listener(message, level)
+    
+    def setup_flask_routes(self):
+        @self.app.before_request
+        def start_timer():
+            g.started = time.perf_counter()
+
+        @self.app.after_request
+        def count_request(response):
+            # Streams are timed to their first byte, not their whole life
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            METRICS.inc('scale_http_requests_total',
+                        (('route', route), ('method', request.method), ('status', response.status_code)))
+            METRICS.observe('scale_http_request_duration_seconds', time.perf_counter() - g.started,
+                            (('route', route),))
+            return response
+
+        @self.app.route('/get_weight', methods=['GET'])
+        def get_weight():
+            return self.weight_response(self.resolve_channel(request.args.get('scale')))
+
+        @self.app.route('/scales/<channel_id>/weight', methods=['GET'])
+        def get_channel_weight(channel_id):
+            return self.weight_response(self.resolve_channel(channel_id))
+
+        @self.app.route('/scales', methods=['GET'])
+        def list_scales():
+            return jsonify({
+                'scales': [dict(channel.info(), **self.reading_payload(channel.latest, channel))
+                           for channel in self.channels.values()],
+                'success': True,
+            })
+
+        @self.app.route('/weights', methods=['GET'])
+        def get_all_weights():
+            self.request_log.record(request.remote_addr, "all scales")
+            return jsonify({
+                'weights': {channel_id: self.reading_payload(channel.latest, channel)
+                            for channel_id, channel in self.channels.items()},
+                'success': True,
+            })
+
+        @self.app.route('/stream_weight', methods=['GET'])
+        def stream_weight():
+            return self.stream_response(self.resolve_channel(request.args.get('scale')))
+
+        @self.app.route('/scales/<channel_id>/stream', methods=['GET'])
+        def stream_channel_weight(channel_id):
+            return self.stream_response(self.resolve_channel(channel_id))
+
+        @self.app.route('/history', methods=['GET'])
+        def get_history():
+            return self.history_response(self.resolve_channel(request.args.get('scale')))
+
+        @self.app.route('/scales/<channel_id>/history', methods=['GET'])
+        def get_channel_history(channel_id):
+            return self.history_response(self.resolve_channel(channel_id))
+
+        @self.app.route('/metrics', methods=['GET'])
+        def metrics():
+            totals = METRICS.collect()
+            gauges = self.metric_gauges()
+            if request.args.get('format') == 'json':
+                return jsonify(dict(metrics_json(totals, gauges), success=True))
+            return Response(render_prometheus(totals, gauges), mimetype='text/plain; version=0.0.4')
+
+        @self.app.route('/push', methods=['GET'])
+        def push_status():
+            pusher = self.pusher
+            return jsonify(dict(pusher.status() if pusher else {}, enabled=pusher is not None, success=True))
+
+        @self.app.errorhandler(400)
+        def bad_request(error):
+            return jsonify({'error': getattr(error, 'description', 'Bad request'), 'success': False}), 400
+
+        @self.app.errorhandler(404)
+        def not_found(error):
+            return jsonify({'error': getattr(error, 'description', 'Not found'), 'success': False}), 404
+
+    def resolve_channel(self, channel_id=None):
+        """Return the requested channel (default: the first one) or 404"""
+        if not channel_id:
+            return next(iter(self.channels.values()))
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            abort(404, description=f"Unknown scale channel '{channel_id}'")
+        return channel
+
+    def weight_response(self, channel):
+        """Latest reading, optionally waiting for a stable or a newer one
+
+        ``?since=<seq>&timeout=<ms>`` long-polls: the answer comes as soon as
+        the channel has a reading other than seq (a restarted acquisition
+        counts as newer). ``If-None-Match`` with the last ETag gets a 304 when
+        nothing changed.
+        """
+        wait_stable = request.args.get('wait_stable', type=int)
+        since = request.args.get('since', type=int)
+        reading = channel.latest
+        if since is not None and reading.seq == since:
+            timeout = request.args.get('timeout', wait_stable or MAX_WAIT_STABLE_MS, type=int)
+            timeout = min(max(timeout, 0), MAX_WAIT_STABLE_MS) / 1000.0
+            if wait_stable:
+                reading = channel.wait_for(lambda r: r.seq != since and r.stable, timeout)
+            else:
+                reading = channel.wait_for(lambda r: r.seq != since, timeout)
+        elif wait_stable and not reading.stable:
+            timeout = min(max(wait_stable, 0), MAX_WAIT_STABLE_MS) / 1000.0
+            reading = channel.wait_stable(timeout)
+        self.request_log.record(request.remote_addr, channel.channel_id)
+        etag = channel.etag(reading)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=304, headers=headers)
+        response = jsonify(self.reading_payload(reading, channel))
+        response.headers.update(headers)
+        return response
+
+    def metric_gauges(self):
+        """Point-in-time values for /metrics: (name, help, [(labels, value)])"""
+        now = time.time()
+        channels = list(self.channels.values())
+        gauges = [
+            ('scale_up', "1 while the channel's acquisition is running",
+             [((('scale', c.channel_id),), int(c.running)) for c in channels]),
+            ('scale_last_reading_age_seconds', "Seconds since the last decoded reading",
+             [((('scale', c.channel_id),), round(now - c.latest.timestamp, 3))
+              for c in channels if c.latest.timestamp]),
+            ('scale_source_state', "1 for the channel's current source state",
+             [((('scale', c.channel_id), ('state', c.source_state)), 1) for c in channels]),
+            ('scale_stream_subscribers', "Open event streams",
+             [((('scale', c.channel_id),), len(c.broadcaster)) for c in channels]),
+            ('scale_log_records_dropped', "Log records dropped because the log queue was full",
+             [((), self.log_queue_handler.dropped)]),
+        ]
+        pusher = self.pusher
+        if pusher:
+            gauges.append(('scale_push_pending', "Captures waiting in the outbox", [((), len(pusher.outbox))]))
+        return gauges
+
+    def history_response(self, channel):
+        try:
+            end = parse_time(request.args.get('to'), time.time())
+            start = parse_time(request.args.get('from'), end - 3600)
+            resolution = float(request.args.get('resolution') or 0)
+        except ValueError as e:
+            abort(400, description=f"Invalid history query: {e}")
+        if not (math.isfinite(start) and math.isfinite(end) and math.isfinite(resolution)):
+            abort(400, description="'from', 'to' and 'resolution' must be finite numbers")
+        if end <= start or resolution < 0:
+            abort(400, description="'from' must be before 'to' and 'resolution' must not be negative")
+        if resolution and (end - start) / resolution > HISTORY_MAX_POINTS:
+            abort(400, description=f"At most {HISTORY_MAX_POINTS} buckets per request, increase 'resolution'")
+        points, truncated = self.open_history(channel).query(start, end, resolution)
+        return jsonify({
+            'scale': channel.channel_id,
+            'from': datetime.fromtimestamp(start).isoformat(),
+            'to': datetime.fromtimestamp(end).isoformat(),
+            'resolution': resolution or None,
+            'points': points,
+            'truncated': truncated,
+            'success': True,
+        })
+
+    def open_history(self, channel):
+        """Return the channel's history store, opening its file on first use"""
+        with self._history_lock:
+            if channel.history is None:
+                os.makedirs(self.history_dir, exist_ok=True)
+                path = os.path.join(self.history_dir, f"{channel.channel_id}.hist")
+                channel.history = HistoryStore(path, self.history_bytes, min_interval=self.history_interval)
+            return channel.history
+
+    def stream_response(self, channel):
+        if sum(len(c.broadcaster) for c in self.channels.values()) >= self.max_streams:
+            return jsonify({'error': "Too many open streams, poll /get_weight instead", 'success': False}), 503
+        subscriber = StreamSubscriber(
+            request.remote_addr,
+            min_delta=request.args.get('min_delta', STREAM_MIN_DELTA, type=float),
+            max_rate=request.args.get('max_rate', STREAM_MAX_RATE, type=float),
+        )
+        return Response(self.stream_events(channel, subscriber), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+
+    def stream_events(self, channel, subscriber):
+        """Server-Sent Events generator for one subscriber"""
+        broadcaster = channel.broadcaster
+        broadcaster.subscribe(subscriber)
+        self.log(f"[{channel.channel_id}] Stream opened by {subscriber.client} ({len(broadcaster)} active)", "INFO")
+        try:
+            # Send the current value immediately so the client never starts blank
+            reading = channel.latest
+            while self.running:
+                if reading is None:
+                    yield ": keepalive\n\n"
+                else:
+                    payload = self.reading_payload(reading, channel)
+                    yield f"id: {reading.seq}\nevent: weight\ndata: {json.dumps(payload)}\n\n"
+                reading = subscriber.take(STREAM_KEEPALIVE)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+            self.log(f"[{channel.channel_id}] Stream closed by {subscriber.client} ({len(broadcaster)} active)", "INFO")
+
+    def reading_payload(self, reading, channel=None):
+        """JSON body shared by the weight endpoints
+
+        With a channel, also says whether the value is live: ``age_ms`` since
+        the reading and the channel's ``source_state`` ("connected", "stale",
+        "connecting", "disconnected" or "stopped").
+        """
+        payload = {
+            'weight': reading.weight,
+            'raw_weight': reading.raw_weight,
+            'timestamp': datetime.fromtimestamp(reading.timestamp).isoformat() if reading.timestamp else None,
+            'seq': reading.seq,
+            'stable': reading.stable,
+            'stable_weight': reading.stable_weight,
+            'unit': reading.unit,
+            'motion': reading.motion,
+            'overload': reading.overload,
+            'net': reading.net,
+            'success': True,
+        }
+        if channel is not None:
+            payload['scale'] = channel.channel_id
+            payload['age_ms'] = int((time.time() - reading.timestamp) * 1000) if reading.timestamp else None
+            payload['source_state'] = channel.source_state
+        return payload
+    
+    def create_stability_detector(self):
+        return StabilityDetector(**self.stability)
+
+    def start(self):
+        """Start acquisition on every channel and serve HTTP; raises on failure"""
+        self.log("Starting server...", "INFO")
+        self.running = True
+        try:
+            # Create Flask server (pooled: ?wait_stable and streams hold requests open)
+            self.http_server = PooledWSGIServer('0.0.0.0', self.server_port, self.app,
+                                                workers=self.http_workers,
+                                                backlog=self.http_backlog,
+                                                request_timeout=self.http_request_timeout)
+            
+            if self.push['url']:
+                outbox = PushOutbox(os.path.join(APP_DIR, self.push['outbox']))
+                self.pusher = OdooPusher(outbox, self.push['url'], self.log, token=self.push['token'] or None,
+                                         min_weight=self.push['min_weight'],
+                                         repeat_tolerance=self.push['repeat_tolerance'])
+                self.pusher.start()
+                self.log(f"Pushing stable captures to {self.push['url']} ({len(outbox)} pending)", "INFO")
+            
+            if self.udp['group']:
+                self.udp_publisher = UdpPublisher(self.udp['group'], self.udp['port'], ttl=self.udp['ttl'],
+                                                  interface=self.udp['interface'] or None)
+                self.log(f"Publishing readings to {self.udp_publisher.describe()}", "INFO")
+            
+            # Start acquisition before serving so the first poll has data
+            capture = self.pusher.capture if self.pusher else None
+            for channel in self.channels.values():
+                self.open_history(channel)
+                channel.start(self.log, self.create_stability_detector(), capture, self.udp_publisher)
+            
+            # Start Flask in thread
+            self.request_log.start()
+            self.server_thread = threading.Thread(target=self.run_http, name="http-server", daemon=True)
+            self.server_thread.start()
+        except Exception as e:
+            self.log(f"Failed to start server: {e}", "ERROR")
+            self.stop()
+            raise
+        
+        self.log(f"Server started successfully on port {self.server_port}", "SUCCESS")
+        for channel in self.channels.values():
+            self.log(f"Scale channel {channel.describe()}", "INFO")
+    
+    def run_http(self):
+        """Run Flask server in thread"""
+        try:
+            self.http_server.serve_forever()
+        except Exception as e:
+            if self.running:
+                self.log(f"Server error: {e}", "ERROR")
+    
+    def stop(self):
+        self.log("Stopping server...", "INFO")
+        self.running = False
+        
+        # Stop Flask server
+        if self.http_server:
+            try:
+                if self.server_thread and self.server_thread.is_alive():
+                    self.http_server.shutdown()
+                else:
+                    self.http_server.server_close()
+                self.log("Flask server stopped successfully", "SUCCESS")
+            except Exception as e:
+                self.log(f"Error stopping Flask server: {e}", "WARNING")
+            self.http_server = None
+        
+        # Stop acquisition (closes the serial connections)
+        for channel in self.channels.values():
+            channel.stop()
+        
+        # Captures still in memory are written to the outbox before exit
+        if self.pusher:
+            self.pusher.stop()
+            self.pusher.outbox.close()
+            self.pusher = None
+        
+        if self.udp_publisher:
+            self.udp_publisher.close()
+            self.udp_publisher = None
+        
+        self.request_log.stop()
+    
+    def close(self):
+        """Stop serving and flush the log pipeline"""
+        if self.running:
+            self.stop()
+        for channel in self.channels.values():
+            if channel.history is not None:
+                channel.history.close()
+                channel.history = None
+        self.log_listener.stop()
+
 
 class ScaleWeightApp:
-    def __init__(self, root):
+    # GUI refresh period for the weight display (the acquisition thread
+    # itself runs at the indicator's native rate)
+    DISPLAY_REFRESH_MS = 200
+    # The activity log is filled in batches and keeps only the newest lines
+    LOG_FLUSH_MS = 250
+    LOG_BUFFER_SIZE = 1000
+    MAX_LOG_LINES = 2000
+    LOG_ICONS = {
+        "INFO": "ℹ️",
+        "SUCCESS": "✅",
+        "WARNING": "⚠️",
+        "ERROR": "❌",
+        "WEIGHT": "⚖️"
+    }
+
+    def __init__(self, root, server):
         self.root = root
+        self.server = server
         self.root.title("Scale Weight Server - Professional Edition")
-        self.root.geometry("1400x700")
+        self.root.geometry("1400x780")
         self.root.resizable(False, False)
         self.root.configure(bg="#ecf0f1")
         
@@ -32,31 +2808,33 @@ class ScaleWeightApp:
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
         x = (screen_width // 2) - (1400 // 2)
-        y = (screen_height // 2) - (700 // 2)
-        self.root.geometry(f"1400x700+{x}+{y}")
-        
-        # Variables
-        self.mode = tk.StringVar(value="simulation")
-        self.serial_port = tk.StringVar(value="COM3")
-        self.baudrate = tk.IntVar(value=9600)
-        self.server_port = tk.IntVar(value=5000)
-        self.current_weight = 0.0
-        self.server_running = False
-        self.serial_connection = None
-        self.flask_server = None
-        self.server_thread = None
-        self.local_ip = self.get_local_ip()
+        y = (screen_height // 2) - (780 // 2)
+        self.root.geometry(f"1400x780+{x}+{y}")
+        
+        # Variables (the form edits one channel at a time)
+        first_channel = next(iter(self.server.channels.values()))
+        self.mode = tk.StringVar(value=first_channel.mode)
+        self.serial_port = tk.StringVar(value=first_channel.serial_port)
+        self.baudrate = tk.IntVar(value=first_channel.baudrate)
+        self.protocol = tk.StringVar(value=first_channel.protocol)
+        self.server_port = tk.IntVar(value=self.server.server_port)
+        self.stability_window = tk.DoubleVar(value=self.server.stability['window'])
+        self.stability_deviation = tk.DoubleVar(value=self.server.stability['max_deviation'])
+        self.stability_duration = tk.DoubleVar(value=self.server.stability['min_duration'])
+        self.auto_start = tk.BooleanVar(value=self.server.auto_start)
+        self.selected_channel = tk.StringVar(value=first_channel.channel_id)
+        self._editing_channel = first_channel.channel_id
+        self._displayed_seq = 0
+        self._displayed_state = None
+        self.discovered_ip = None
         
         # System tray icon
         self.tray_icon = None
         self.setup_tray_icon()
         
-        # Logging setup (before Flask)
-        self.setup_logging()
-        
-        # Flask app
-        self.app = Flask(__name__)
-        self.setup_flask_routes()
+        # Log entries from any thread are buffered and flushed by flush_ui_log
+        self.ui_log_buffer = deque(maxlen=self.LOG_BUFFER_SIZE)
+        self.server.log_listeners.append(self.buffer_ui_log)
         
         # UI Setup
         self.setup_ui()
@@ -66,19 +2844,45 @@ class ScaleWeightApp:
         
         # Initial log
         self.root.after(100, lambda: self.log("Application started successfully", "SUCCESS"))
-        self.root.after(200, lambda: self.log(f"Local IP Address: {self.local_ip}", "INFO"))
+        self.discover_local_ip()
         
-    def get_local_ip(self):
-        """Get local machine IP address"""
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
-            return "127.0.0.1"
+        # Unattended boxes come back to full service without anyone clicking
+        if self.server.auto_start:
+            self.root.after(0, lambda: self.start_server(notify=False))
+    
+    @property
+    def server_running(self):
+        return self.server.running
+    
+    @property
+    def local_ip(self):
+        return self.server.local_ip
+    
+    def log(self, message, level="INFO"):
+        self.server.log(message, level)
+    
+    def discover_local_ip(self):
+        """Probe the local IP off the Tk thread and show it when known"""
+        def probe():
+            ip = self.local_ip
+            self.root.after(0, lambda: self.show_local_ip(ip))
+        threading.Thread(target=probe, name="ip-discovery", daemon=True).start()
+    
+    def show_local_ip(self, ip):
+        self.discovered_ip = ip
+        self.ip_label.config(text=f"🌐 Server IP: {ip}")
+        self.log(f"Local IP Address: {ip}", "INFO")
+        if self.server_running:
+            self.log_access_url()
     
+    def log_access_url(self):
+        self.log(f"Access URL: http://{self.discovered_ip}:{self.server_port.get()}/get_weight", "INFO")
+    
+    def buffer_ui_log(self, message, level):
+        """Queue an entry for the activity log widget (any thread)"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.ui_log_buffer.append((f"[{timestamp}] {self.LOG_ICONS.get(level, '•')} {message}\n", level))
+        
     def create_tray_image(self):
         """Create system tray icon image"""
         width = 64
@@ -145,12 +2949,15 @@ class ScaleWeightApp:
     
     def quit_app(self, icon=None, item=None):
         """Quit application completely"""
+        self.save_config()
         if self.server_running:
-            self.stop_server()
+            self.stop_server(notify=False)
         
         if self.tray_icon:
             self.tray_icon.stop()
         
+        self.server.close()
+        
         self.root.quit()
         self.root.destroy()
     
@@ -167,8 +2974,9 @@ class ScaleWeightApp:
         ip_frame = tk.Frame(header, bg="#1a252f")
         ip_frame.pack(pady=(0, 10))
         
-        tk.Label(ip_frame, text=f"🌐 Server IP: {self.local_ip}", 
-                font=("Arial", 11), bg="#1a252f", fg="#3498db").pack(side=tk.LEFT, padx=5)
+        self.ip_label = tk.Label(ip_frame, text="🌐 Server IP: ...", 
+                                 font=("Arial", 11), bg="#1a252f", fg="#3498db")
+        self.ip_label.pack(side=tk.LEFT, padx=5)
         
         tk.Button(ip_frame, text="⚙️ Settings", command=self.open_settings,
                  bg="#ecf0f1", font=("Arial", 9), 
@@ -195,6 +3003,20 @@ class ScaleWeightApp:
                                    bg="#ecf0f1", fg="#2c3e50", padx=15, pady=12)
         mode_frame.pack(fill=tk.X, pady=(0, 12))
         
+        channel_row = tk.Frame(mode_frame, bg="#ecf0f1")
+        channel_row.pack(fill=tk.X, pady=(0, 4))
+        tk.Label(channel_row, text="Scale Channel:", font=("Arial", 10),
+                bg="#ecf0f1", width=15, anchor=tk.W).pack(side=tk.LEFT)
+        self.channel_combo = ttk.Combobox(channel_row, textvariable=self.selected_channel,
+                                          values=list(self.server.channels), state="readonly",
+                                          font=("Arial", 10), width=15)
+        self.channel_combo.pack(side=tk.LEFT, padx=5)
+        self.channel_combo.bind("<<ComboboxSelected>>", self.on_channel_selected)
+        tk.Button(channel_row, text="➕", command=self.add_channel,
+                 bg="#27ae60", fg="white", font=("Arial", 9), width=3).pack(side=tk.LEFT, padx=2)
+        tk.Button(channel_row, text="🗑️", command=self.remove_channel,
+                 bg="#e74c3c", fg="white", font=("Arial", 9), width=3).pack(side=tk.LEFT, padx=2)
+        
         tk.Radiobutton(mode_frame, text="🔄 Simulation Mode", variable=self.mode,
                       value="simulation", font=("Arial", 10), bg="#ecf0f1",
                       command=self.on_mode_change).pack(anchor=tk.W, pady=4)
@@ -229,6 +3051,15 @@ class ScaleWeightApp:
                     values=[4800, 9600, 19200, 38400, 57600, 115200],
                     font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
         
+        # Indicator protocol
+        protocol_row = tk.Frame(self.hw_frame, bg="#ecf0f1")
+        protocol_row.pack(fill=tk.X, pady=5)
+        tk.Label(protocol_row, text="Protocol:", font=("Arial", 10), 
+                bg="#ecf0f1", width=15, anchor=tk.W).pack(side=tk.LEFT)
+        self.protocol_combo = ttk.Combobox(protocol_row, textvariable=self.protocol, values=list(PROTOCOLS),
+                                           state="readonly", font=("Arial", 10), width=15)
+        self.protocol_combo.pack(side=tk.LEFT, padx=5)
+        
         # Weight Display
         weight_frame = tk.LabelFrame(left_frame, text="📊 Current Weight", 
                                     font=("Arial", 11, "bold"),
@@ -286,7 +3117,7 @@ class ScaleWeightApp:
         tk.Button(log_ctrl, text="🗑️ Clear Log", command=self.clear_log,
                  bg="#95a5a6", fg="white", font=("Arial", 9), width=12).pack(side=tk.LEFT, padx=2)
         
-        tk.Label(log_ctrl, text="📁 Auto-saved daily to logs/ folder", 
+        tk.Label(log_ctrl, text=f"📁 Auto-saved daily to logs/ folder (showing last {self.MAX_LOG_LINES} lines)", 
                 font=("Arial", 8), bg="#ecf0f1", fg="#7f8c8d").pack(side=tk.LEFT, padx=10)
         
         # Log text area
@@ -304,9 +3135,10 @@ class ScaleWeightApp:
         self.log_text.tag_config("ERROR", foreground="#ec7063")
         self.log_text.tag_config("WEIGHT", foreground="#bb8fce")
         
-        # Initialize
-        self.refresh_ports()
+        # Initialize (keep the saved port even if its adapter is not plugged in yet)
+        self.refresh_ports(keep_selection=True)
         self.on_mode_change()
+        self.flush_ui_log()
         
     def open_settings(self):
         """Open settings dialog"""
@@ -317,7 +3149,7 @@ class ScaleWeightApp:
         # Create settings window
         settings_win = tk.Toplevel(self.root)
         settings_win.title("Server Settings")
-        settings_win.geometry("400x200")
+        settings_win.geometry("400x380")
         settings_win.resizable(False, False)
         settings_win.configure(bg="#ecf0f1")
         settings_win.transient(self.root)
@@ -326,8 +3158,8 @@ class ScaleWeightApp:
         # Center window
         settings_win.update_idletasks()
         x = (settings_win.winfo_screenwidth() // 2) - (400 // 2)
-        y = (settings_win.winfo_screenheight() // 2) - (200 // 2)
-        settings_win.geometry(f"400x200+{x}+{y}")
+        y = (settings_win.winfo_screenheight() // 2) - (380 // 2)
+        settings_win.geometry(f"400x380+{x}+{y}")
         
         # Title
         tk.Label(settings_win, text="⚙️ Server Settings", 
@@ -347,6 +3179,26 @@ class ScaleWeightApp:
         tk.Label(port_frame, text="(1024-65535)", font=("Arial", 9), 
                 bg="#ecf0f1", fg="#7f8c8d").pack(side=tk.LEFT)
         
+        # Stability detection settings
+        stability_frame = tk.LabelFrame(settings_win, text="Stability Detection", font=("Arial", 10, "bold"),
+                                        bg="#ecf0f1", fg="#2c3e50", padx=10, pady=5)
+        stability_frame.pack(fill=tk.X, padx=20)
+        
+        stability_entries = {}
+        for row, (label, var) in enumerate([("Window (s):", self.stability_window),
+                                            ("Max deviation (kg):", self.stability_deviation),
+                                            ("Min stable time (s):", self.stability_duration)]):
+            tk.Label(stability_frame, text=label, font=("Arial", 10),
+                    bg="#ecf0f1", fg="#2c3e50", width=18, anchor=tk.W).grid(row=row, column=0, pady=2)
+            entry = tk.Entry(stability_frame, font=("Arial", 10), width=10)
+            entry.insert(0, str(var.get()))
+            entry.grid(row=row, column=1, pady=2)
+            stability_entries[var] = entry
+        
+        auto_start = tk.BooleanVar(value=self.auto_start.get())
+        tk.Checkbutton(settings_win, text="Start server automatically on launch", variable=auto_start,
+                      font=("Arial", 10), bg="#ecf0f1", fg="#2c3e50").pack(pady=(10, 0))
+        
         # Buttons
         btn_frame = tk.Frame(settings_win, bg="#ecf0f1")
         btn_frame.pack(pady=20)
@@ -358,13 +3210,28 @@ class ScaleWeightApp:
                     messagebox.showerror("Error", "Port must be between 1024 and 65535")
                     return
                 
+                stability_values = {var: float(entry.get()) for var, entry in stability_entries.items()}
+                if any(value < 0 for value in stability_values.values()):
+                    messagebox.showerror("Error", "Stability settings must not be negative")
+                    return
+                for var, value in stability_values.items():
+                    var.set(value)
+                self.server.stability = {'window': self.stability_window.get(),
+                                         'max_deviation': self.stability_deviation.get(),
+                                         'min_duration': self.stability_duration.get()}
+                
+                self.auto_start.set(auto_start.get())
+                self.server.auto_start = auto_start.get()
+                
                 old_port = self.server_port.get()
                 self.server_port.set(new_port)
+                self.server.server_port = new_port
                 self.log(f"Server port changed from {old_port} to {new_port}", "INFO")
+                self.save_config()
                 messagebox.showinfo("Success", f"Server port updated to {new_port}")
                 settings_win.destroy()
             except ValueError:
-                messagebox.showerror("Error", "Please enter a valid port number")
+                messagebox.showerror("Error", "Please enter valid numeric settings")
         
         tk.Button(btn_frame, text="💾 Save", command=save_settings,
                  bg="#27ae60", fg="white", font=("Arial", 10, "bold"),
@@ -374,59 +3241,29 @@ class ScaleWeightApp:
                  bg="#95a5a6", fg="white", font=("Arial", 10, "bold"),
                  width=10, cursor="hand2").pack(side=tk.LEFT, padx=5)
     
-    def setup_logging(self):
-        """Setup file logging"""
-        log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        
-        log_file = os.path.join(log_dir, f'scale_server_{datetime.now().strftime("%Y%m%d")}.log')
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
-    
-    def log(self, message, level="INFO"):
-        """Add log entry to UI and file"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Add icon based on level
-        icons = {
-            "INFO": "ℹ️",
-            "SUCCESS": "✅",
-            "WARNING": "⚠️",
-            "ERROR": "❌",
-            "WEIGHT": "⚖️"
-        }
-        icon = icons.get(level, "•")
-        log_entry = f"[{timestamp}] {icon} {message}\n"
-        
-        # Log to file
-        if level == "ERROR":
-            self.logger.error(message)
-        elif level == "WARNING":
-            self.logger.warning(message)
-        elif level == "SUCCESS":
-            self.logger.info(f"✓ {message}")
-        else:
-            self.logger.info(message)
-        
-        # Log to UI (thread-safe)
-        def update_ui():
+    def flush_ui_log(self):
+        """Move buffered entries into the log widget, trimming old lines"""
+        buffer = self.ui_log_buffer
+        if buffer:
             self.log_text.config(state=tk.NORMAL)
-            self.log_text.insert(tk.END, log_entry, level)
+            while buffer:
+                entry, level = buffer.popleft()
+                self.log_text.insert(tk.END, entry, level)
+            lines = int(self.log_text.index('end-1c').split('.')[0])
+            if lines > self.MAX_LOG_LINES:
+                self.log_text.delete('1.0', f"{lines - self.MAX_LOG_LINES + 1}.0")
             self.log_text.see(tk.END)
             self.log_text.config(state=tk.DISABLED)
-        
-        if threading.current_thread() == threading.main_thread():
-            update_ui()
-        else:
-            self.root.after(0, update_ui)
+        self.root.after(self.LOG_FLUSH_MS, self.flush_ui_log)
+    
+    def latest_reading(self, channel_id=None):
+        """Return the most recent reading without blocking"""
+        channel = self.server.channels.get(channel_id or self.selected_channel.get())
+        return channel.latest if channel else EMPTY_READING
+
+    @property
+    def current_weight(self):
+        return self.latest_reading().weight
     
     def clear_log(self):
         """Clear log display"""
@@ -435,12 +3272,69 @@ class ScaleWeightApp:
         self.log_text.config(state=tk.DISABLED)
         self.root.after(100, lambda: self.log("Log display cleared", "INFO"))
     
-    def setup_flask_routes(self):
-        @self.app.route('/get_weight', methods=['GET'])
-        def get_weight():
-            client_ip = request.remote_addr
-            self.log(f"Request from {client_ip} → Weight: {self.current_weight:,.2f} kg", "WEIGHT")
-            return jsonify({'weight': self.current_weight, 'success': True})
+    def store_channel_settings(self):
+        """Copy the hardware form into the channel being edited"""
+        channel = self.server.channels.get(self._editing_channel)
+        if channel:
+            channel.mode = self.mode.get()
+            channel.serial_port = self.serial_port.get()
+            channel.baudrate = self.baudrate.get()
+            channel.protocol = self.protocol.get()
+    
+    def save_config(self):
+        """Persist the form and server settings so they survive a restart"""
+        self.store_channel_settings()
+        if self.server.save_config():
+            self.log(f"Settings saved to {self.server.config_path}", "INFO")
+    
+    def load_channel_settings(self, channel_id):
+        """Show a channel's settings in the hardware form"""
+        channel = self.server.channels[channel_id]
+        self._editing_channel = channel_id
+        self.selected_channel.set(channel_id)
+        self.mode.set(channel.mode)
+        self.serial_port.set(channel.serial_port)
+        self.baudrate.set(channel.baudrate)
+        self.protocol.set(channel.protocol)
+        self._displayed_seq = -1
+        self.on_mode_change()
+    
+    def on_channel_selected(self, event=None):
+        self.store_channel_settings()
+        self.load_channel_settings(self.selected_channel.get())
+    
+    def add_channel(self):
+        if self.server_running:
+            messagebox.showwarning("Warning", "Please stop the server before adding scale channels.")
+            return
+        self.store_channel_settings()
+        index = len(self.server.channels) + 1
+        while f"scale{index}" in self.server.channels:
+            index += 1
+        channel_id = f"scale{index}"
+        self.server.channels[channel_id] = ScaleChannel(channel_id)
+        self.channel_combo['values'] = list(self.server.channels)
+        self.load_channel_settings(channel_id)
+        self.log(f"Scale channel '{channel_id}' added", "INFO")
+        self.save_config()
+    
+    def remove_channel(self):
+        if self.server_running:
+            messagebox.showwarning("Warning", "Please stop the server before removing scale channels.")
+            return
+        if len(self.server.channels) == 1:
+            messagebox.showwarning("Warning", "At least one scale channel is required.")
+            return
+        channel_id = self.selected_channel.get()
+        if not messagebox.askyesno("Remove Channel", f"Remove scale channel '{channel_id}'?"):
+            return
+        channel = self.server.channels.pop(channel_id)
+        if channel.history is not None:
+            channel.history.close()
+        self.channel_combo['values'] = list(self.server.channels)
+        self.load_channel_settings(next(iter(self.server.channels)))
+        self.log(f"Scale channel '{channel_id}' removed", "INFO")
+        self.save_config()
     
     def on_mode_change(self):
         mode = self.mode.get()
@@ -455,124 +3349,79 @@ class ScaleWeightApp:
             for child in self.hw_frame.winfo_children():
                 for widget in child.winfo_children():
                     if isinstance(widget, (ttk.Combobox, tk.Entry, tk.Button)):
-                        widget.config(state=tk.NORMAL)
+                        widget.config(state="readonly" if widget is self.protocol_combo else tk.NORMAL)
     
-    def refresh_ports(self):
+    def refresh_ports(self, keep_selection=False):
         ports = [port.device for port in serial.tools.list_ports.comports()]
         self.port_combo['values'] = ports if ports else ['No ports found']
         if ports:
             self.log(f"Found {len(ports)} serial port(s): {', '.join(ports)}", "INFO")
-            if self.serial_port.get() not in ports:
+            if self.serial_port.get() not in ports and not keep_selection:
                 self.serial_port.set(ports[0])
         else:
             self.log("No serial ports detected", "WARNING")
     
-    def read_weight(self):
-        if self.mode.get() == "simulation":
-            # Simulation mode
-            if random.random() > 0.5:
-                return round(random.uniform(25000, 35000), 2)
-            else:
-                return round(random.uniform(10000, 15000), 2)
-        else:
-            # Hardware mode
-            try:
-                if not self.serial_connection or not self.serial_connection.is_open:
-                    self.serial_connection = serial.Serial(
-                        self.serial_port.get(), 
-                        self.baudrate.get(), 
-                        timeout=1
-                    )
-                    self.log(f"Connected to {self.serial_port.get()}", "SUCCESS")
-                
-                raw_line = self.serial_connection.readline().decode('utf-8').strip()
-                # Parse weight from serial data (adjust parsing as needed)
-                weight = float(''.join(filter(str.isdigit or '.'.__eq__, raw_line)))
-                return round(weight, 2)
-            except serial.SerialException as e:
-                self.log(f"Serial error: {e}", "ERROR")
-                return self.current_weight
-            except Exception as e:
-                self.log(f"Error reading weight: {e}", "WARNING")
-                return self.current_weight
-    
     def update_weight_display(self):
         if self.server_running:
-            self.current_weight = self.read_weight()
-            self.weight_label.config(text=f"{self.current_weight:,.2f} kg")
-            self.last_update.config(text=f"Last update: {datetime.now().strftime('%H:%M:%S')}")
-            self.root.after(1000, self.update_weight_display)
-    
-    def start_server(self):
+            reading = self.latest_reading()
+            channel = self.server.channels.get(self.selected_channel.get())
+            state = channel.source_state if channel else "stopped"
+            if reading.seq != self._displayed_seq or state != self._displayed_state:
+                self._displayed_seq = reading.seq
+                self._displayed_state = state
+                self.weight_label.config(text=f"{reading.weight:,.2f} kg")
+                updated = datetime.fromtimestamp(reading.timestamp).strftime('%H:%M:%S') if reading.timestamp else "Never"
+                if state == "connected":
+                    self.last_update.config(text=f"Last update: {updated}", fg="#7f8c8d")
+                else:
+                    # Make a frozen value obvious
+                    self.last_update.config(text=f"Last update: {updated} ({state.upper()})", fg="#e74c3c")
+            self.root.after(self.DISPLAY_REFRESH_MS, self.update_weight_display)
+
+    def start_server(self, notify=True):
+        self.server.server_port = self.server_port.get()
+        self.save_config()
         try:
-            self.log("Starting server...", "INFO")
-            
-            self.server_running = True
-            self.start_btn.config(state=tk.DISABLED)
-            self.stop_btn.config(state=tk.NORMAL)
-            self.status_label.config(text="● RUNNING", fg="#27ae60")
-            
-            # Create Flask server
-            self.flask_server = make_server('0.0.0.0', self.server_port.get(), self.app)
-            
-            # Start Flask in thread
-            self.server_thread = threading.Thread(target=self.run_flask, daemon=True)
-            self.server_thread.start()
-            
-            # Start weight updates
-            self.update_weight_display()
-            
-            self.log(f"Server started successfully on port {self.server_port.get()}", "SUCCESS")
-            self.log(f"Access URL: http://{self.local_ip}:{self.server_port.get()}/get_weight", "INFO")
-            self.log(f"Operating mode: {self.mode.get().upper()}", "INFO")
-            
+            self.server.start()
+        except Exception as e:
+            # server.start() has already logged the failure
+            if notify:
+                messagebox.showerror("Error", f"Failed to start server: {e}")
+            return
+        
+        self.start_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.NORMAL)
+        self.status_label.config(text="● RUNNING", fg="#27ae60")
+        
+        # Start weight updates
+        self.update_weight_display()
+        
+        # An auto-start can beat the IP probe; show_local_ip logs the URL then
+        if self.discovered_ip:
+            self.log_access_url()
+        if notify:
             messagebox.showinfo("Success", 
                               f"Server started successfully!\n\n"
                               f"URL: http://{self.local_ip}:{self.server_port.get()}/get_weight\n"
-                              f"Mode: {self.mode.get().upper()}")
-        except Exception as e:
-            self.log(f"Failed to start server: {e}", "ERROR")
-            messagebox.showerror("Error", f"Failed to start server: {e}")
-            self.stop_server()
-    
-    def run_flask(self):
-        """Run Flask server in thread"""
-        try:
-            self.flask_server.serve_forever()
-        except Exception as e:
-            if self.server_running:
-                self.log(f"Server error: {e}", "ERROR")
+                              f"Scale channels: {len(self.server.channels)}")
     
-    def stop_server(self):
-        self.log("Stopping server...", "INFO")
+    def stop_server(self, notify=True):
+        self.server.stop()
         
-        self.server_running = False
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.status_label.config(text="● STOPPED", fg="#e74c3c")
         
-        # Stop Flask server
-        if self.flask_server:
-            try:
-                self.flask_server.shutdown()
-                self.flask_server = None
-                self.log("Flask server stopped successfully", "SUCCESS")
-            except Exception as e:
-                self.log(f"Error stopping Flask server: {e}", "WARNING")
-        
-        # Close serial connection
-        if self.serial_connection and self.serial_connection.is_open:
-            try:
-                self.serial_connection.close()
-                self.log("Serial connection closed", "INFO")
-            except Exception as e:
-                self.log(f"Error closing serial: {e}", "WARNING")
-        
-        messagebox.showinfo("Stopped", "Server has been stopped successfully")
+        if notify:
+            messagebox.showinfo("Stopped", "Server has been stopped successfully")
+
 
-def main():
+def run_gui(config_path):
+    """Run the desktop application with its tray icon"""
+    load_gui_modules()
+    server = ScaleServer(load_config(config_path), config_path=config_path)
     root = tk.Tk()
-    app = ScaleWeightApp(root)
+    app = ScaleWeightApp(root, server)
     
     # Start tray icon in separate thread
     tray_thread = threading.Thread(target=app.run_tray_icon, daemon=True)
@@ -580,5 +3429,44 @@ def main():
     
     root.mainloop()
 
+
+def run_headless(config_path):
+    """Serve every configured channel without a GUI until SIGINT/SIGTERM"""
+    server = ScaleServer(load_config(config_path))
+    stopping = threading.Event()
+    
+    def request_stop(signum, frame):
+        stopping.set()
+    
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    
+    try:
+        server.start()
+    except Exception:
+        server.close()
+        return 1
+    
+    # Wake periodically so signals are handled promptly on every platform
+    while not stopping.wait(1.0):
+        pass
+    
+    server.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scale Weight Server")
+    parser.add_argument('--headless', action='store_true',
+                        help="run without the GUI and tray icon (service/daemon mode)")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help="JSON configuration file (default: %(default)s)")
+    args = parser.parse_args(argv)
+    
+    if args.headless:
+        return run_headless(args.config)
+    run_gui(args.config)
+    return 0
+
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Scale Weight Server - Odoo-side fetch latency benchmark
+
+Compares how long one weight fetch takes from a client's point of view the
+way weighing.scale used to do it (a new requests.get, so a new TCP
+connection per fetch) and the way it does now (a keep-alive requests.Session
+with a small connection pool). By default a local ScaleWeightServer is
+started headless as the stand-in scale; use --url to measure a real scale
+server, e.g. a remote site over the WAN, where the saved handshake is a full
+round trip.
+
+Examples:
+    python fetch_benchmark.py --fetches 2000
+    python fetch_benchmark.py --url http://10.20.0.5:5000 --fetches 200 --threads 4
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scale_benchmark import ServerProcess, percentile
+
+# Same settings as inventory_scale_integration_base/models/weighing_scale.py
+SESSION_POOL_SIZE = 4
+CONNECT_TIMEOUT = 1.0
+READ_TIMEOUT = 2.0
+
+
+def pooled_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SESSION_POOL_SIZE, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def run(url, fetches, threads, use_session):
+    """Run fetches split over threads; return (sorted latencies in s, errors, wall time)"""
+    session = pooled_session() if use_session else None
+    latencies = []
+    errors = [0]
+
+    def worker(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                if session is not None:
+                    response = session.get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+                else:
+                    response = requests.get(url, timeout=READ_TIMEOUT)
+                response.json()
+                if response.status_code != 200:
+                    errors[0] += 1
+                    continue
+            except (requests.RequestException, ValueError):
+                errors[0] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    shares = [fetches // threads + (1 if index < fetches % threads else 0) for index in range(threads)]
+    workers = [threading.Thread(target=worker, args=(share,)) for share in shares]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if session is not None:
+        session.close()
+    return sorted(latencies), errors[0], elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-request and keep-alive weight fetch latency")
+    parser.add_argument('--url', help="scale server to fetch from instead of a local stand-in")
+    parser.add_argument('--port', type=int, default=5098, help="port for the started stand-in server")
+    parser.add_argument('--path', default='/get_weight', help="weight endpoint (default: %(default)s)")
+    parser.add_argument('--fetches', type=int, default=1000, help="fetches per variant")
+    parser.add_argument('--threads', type=int, default=1, help="concurrent fetchers (Odoo worker threads)")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = args.url.rstrip('/') + args.path
+    else:
+        server = ServerProcess(args.port, 'simulation', 1, 0.05, 'toledo')
+        server.start()
+        url = f"http://127.0.0.1:{args.port}{args.path}"
+
+    try:
+        print(f"{args.fetches} fetches of {url} with {args.threads} thread(s)")
+        print(f"{'variant':<22}{'fetches/s':>10}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        print('-' * 77)
+        for name, use_session in (('requests.get (before)', False), ('keep-alive (after)', True)):
+            # One untimed fetch so the first connection's setup is not special-cased
+            run(url, 1, 1, use_session)
+            latencies, errors, elapsed = run(url, args.fetches, args.threads, use_session)
+            mean = sum(latencies) / len(latencies) if latencies else 0.0
+            print(f"{name:<22}{len(latencies) / elapsed:>10.0f}{mean * 1000:>10.2f}"
+                  f"{percentile(latencies, 0.50) * 1000:>9.2f}{percentile(latencies, 0.95) * 1000:>9.2f}"
+                  f"{percentile(latencies, 0.99) * 1000:>9.2f}{errors:>8}")
+    finally:
+        if server:
+            server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
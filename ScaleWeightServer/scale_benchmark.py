@@ -0,0 +1,375 @@
+"""
+Scale Weight Server - HTTP load and latency benchmark
+
+Starts ScaleWeightServer.py headless (simulator, serial replay or virtual
+serial indicators on ptys), drives its
+HTTP API with keep-alive clients at one or more concurrency levels and reports
+throughput, latency percentiles and the server's CPU and memory use.
+
+Examples:
+    python scale_benchmark.py --concurrency 1,8,32 --duration 10
+    python scale_benchmark.py --mode replay --replay-file gate.cap --endpoints get_weight,stream
+    python scale_benchmark.py --mode pty --interval 0.01     # real serial read path, 100 frames/s
+    python scale_benchmark.py --max-p99-ms 20 --min-rps 2000      # CI gate: exit 1 on regression
+    python scale_benchmark.py --url http://10.0.0.5:5000          # an already running server
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ScaleWeightServer.py')
+INDICATOR_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'virtual_indicator.py')
+STARTUP_TIMEOUT = 20.0
+
+# Request path per polling endpoint; "{scale}" is the first channel id
+ENDPOINTS = {
+    'get_weight': '/get_weight',
+    'scale_weight': '/scales/{scale}/weight',
+    'weights': '/weights',
+    'scales': '/scales',
+    'history': '/history?resolution=1',
+    'metrics': '/metrics',
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ServerProcess:
+    """ScaleWeightServer.py --headless in a scratch directory
+
+    In "pty" mode every channel reads a virtual_indicator.py pseudo-terminal
+    in hardware mode, so the real serial code path is measured.
+    """
+
+    def __init__(self, port, mode, channels, interval, protocol, replay_file=None, speed=1.0):
+        self.port = port
+        self.workdir = tempfile.mkdtemp(prefix='scale_bench_')
+        self.indicator_args = []
+        channel = {'mode': mode, 'protocol': protocol, 'simulation_interval': interval, 'speed': speed}
+        if replay_file:
+            channel['replay_file'] = os.path.abspath(replay_file)
+        channel_configs = [dict(channel, id=f"scale{index + 1}") for index in range(channels)]
+        if mode == 'pty':
+            for channel_config in channel_configs:
+                link = os.path.join(self.workdir, f"tty_{channel_config['id']}")
+                channel_config.update(mode='hardware', serial_port=link)
+                self.indicator_args.append([sys.executable, INDICATOR_SCRIPT, '--link', link,
+                                            '--protocol', protocol, '--rate', str(1.0 / interval),
+                                            '--speed', str(speed)])
+        self.config = {
+            'server_port': port,
+            'log_dir': os.path.join(self.workdir, 'logs'),
+            'history_dir': os.path.join(self.workdir, 'history'),
+            'history_mb': 16,
+            'channels': channel_configs,
+        }
+        self.process = None
+        self.indicators = []
+
+    def start_indicators(self):
+        for args in self.indicator_args:
+            self.indicators.append(subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT))
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        for args in self.indicator_args:
+            while not os.path.exists(args[args.index('--link') + 1]):
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Virtual indicators did not start")
+                time.sleep(0.05)
+
+    def start(self):
+        try:
+            self.launch()
+        except BaseException:
+            self.stop()
+            raise
+
+    def launch(self):
+        self.start_indicators()
+        config_path = os.path.join(self.workdir, 'scale_server.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(self.config, f)
+        self.log_file = open(os.path.join(self.workdir, 'server.out'), 'wb')
+        self.process = subprocess.Popen([sys.executable, SERVER_SCRIPT, '--headless', '--config', config_path],
+                                        stdout=self.log_file, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}, see {self.log_file.name}")
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=1)
+                connection.request('GET', '/scales')
+                if connection.getresponse().status == 200:
+                    connection.close()
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("Server did not answer within %d s" % STARTUP_TIMEOUT)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.process:
+            self.log_file.close()
+        for indicator in self.indicators:
+            indicator.terminate()
+            indicator.wait()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class ProcessStats:
+    """CPU time and memory of a process from /proc (Linux only)"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.available = pid is not None and os.path.exists(f'/proc/{pid}/stat')
+        self.ticks = os.sysconf('SC_CLK_TCK') if self.available else 1
+
+    def cpu_seconds(self):
+        if not self.available:
+            return None
+        with open(f'/proc/{self.pid}/stat') as f:
+            # Fields after the parenthesised command name; utime and stime are 14th and 15th
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def memory_mb(self):
+        """Return (current RSS, peak RSS) in MB"""
+        if not self.available:
+            return None, None
+        values = {}
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM'):
+                    values[key] = int(value.split()[0]) / 1024
+        return values.get('VmRSS'), values.get('VmHWM')
+
+
+def poll_worker(host, port, path, stop_at, latencies, counters):
+    """One keep-alive client polling path until stop_at"""
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                counters['errors'] += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            counters['errors'] += 1
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+
+def poll_process(args):
+    """Run a share of the clients in one process (sidesteps the client's GIL)"""
+    host, port, path, clients, duration = args
+    stop_at = time.monotonic() + duration
+    latencies = []
+    counters = {'errors': 0}
+    threads = [threading.Thread(target=poll_worker, args=(host, port, path, stop_at, latencies, counters))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, counters['errors']
+
+
+def stream_worker(host, port, path, stop_at, ages, counters):
+    """One Server-Sent Events subscriber recording how old each event is"""
+    try:
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        connection.request('GET', path)
+        response = connection.getresponse()
+        if response.status != 200:
+            counters['errors'] += 1
+            return
+        while time.monotonic() < stop_at:
+            line = response.fp.readline()
+            if not line:
+                break
+            if line.startswith(b'data: '):
+                payload = json.loads(line[6:])
+                if payload.get('timestamp'):
+                    ages.append(time.time() - datetime.fromisoformat(payload['timestamp']).timestamp())
+        connection.close()
+    except (OSError, http.client.HTTPException, ValueError):
+        counters['errors'] += 1
+
+
+def run_polling(host, port, path, concurrency, duration, processes):
+    processes = max(1, min(processes, concurrency))
+    shares = [concurrency // processes + (1 if index < concurrency % processes else 0) for index in range(processes)]
+    jobs = [(host, port, path, clients, duration) for clients in shares]
+    if processes == 1:
+        results = [poll_process(jobs[0])]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(poll_process, jobs)
+    latencies = sorted(latency for result in results for latency in result[0])
+    return latencies, sum(result[1] for result in results)
+
+
+def run_streams(host, port, path, concurrency, duration):
+    stop_at = time.monotonic() + duration
+    ages = []
+    counters = {'errors': 0}
+    threads = [threading.Thread(target=stream_worker, args=(host, port, path, stop_at, ages, counters))
+               for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(duration + 10)
+    return sorted(ages), counters['errors']
+
+
+def run_scenario(host, port, endpoint, concurrency, duration, processes, stats, scale):
+    cpu_before = stats.cpu_seconds()
+    started = time.monotonic()
+    if endpoint == 'stream':
+        samples, errors = run_streams(host, port, f'/scales/{scale}/stream', concurrency, duration)
+    else:
+        samples, errors = run_polling(host, port, ENDPOINTS[endpoint].format(scale=scale), concurrency,
+                                      duration, processes)
+    elapsed = time.monotonic() - started
+    cpu_after = stats.cpu_seconds()
+    rss, peak_rss = stats.memory_mb()
+    return {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'errors': errors,
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'max_ms': (samples[-1] if samples else 0.0) * 1000,
+        'cpu_percent': (cpu_after - cpu_before) / elapsed * 100 if cpu_before is not None else None,
+        'rss_mb': rss,
+        'peak_rss_mb': peak_rss,
+    }
+
+
+def print_report(results):
+    header = f"{'endpoint':<14}{'conc':>6}{'requests':>10}{'errors':>8}{'req/s':>10}" \
+             f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'cpu %':>8}{'rss MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        cpu = f"{r['cpu_percent']:.0f}" if r['cpu_percent'] is not None else 'n/a'
+        rss = f"{r['rss_mb']:.0f}" if r['rss_mb'] is not None else 'n/a'
+        print(f"{r['endpoint']:<14}{r['concurrency']:>6}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.0f}"
+              f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}{cpu:>8}{rss:>8}")
+    print("(stream rows: requests = events received, latencies = event age on arrival)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Scale Weight Server HTTP API")
+    parser.add_argument('--url', help="benchmark a running server instead of starting one")
+    parser.add_argument('--port', type=int, default=5099, help="port for the started server")
+    parser.add_argument('--mode', choices=['simulation', 'replay', 'pty'], default='simulation',
+                        help="pty: hardware mode reading virtual_indicator.py (Linux/macOS)")
+    parser.add_argument('--replay-file', help="serial capture for --mode replay")
+    parser.add_argument('--protocol', default='toledo')
+    parser.add_argument('--channels', type=int, default=1, help="scale channels on the started server")
+    parser.add_argument('--interval', type=float, default=0.05, help="simulator / indicator frame interval (s)")
+    parser.add_argument('--speed', type=float, default=1.0, help="truck profile / replay speed factor")
+    parser.add_argument('--endpoints', default='get_weight',
+                        help=f"comma separated: {', '.join(list(ENDPOINTS) + ['stream'])}")
+    parser.add_argument('--concurrency', default='1,8,32', help="comma separated client counts")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument('--warmup', type=float, default=1.0, help="seconds of load before measuring")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="client processes sharing the pollers")
+    parser.add_argument('--json', dest='json_file', help="also write results to this JSON file")
+    parser.add_argument('--max-p99-ms', type=float, help="fail (exit 1) if any polling p99 exceeds this")
+    parser.add_argument('--min-rps', type=float, help="fail (exit 1) if any polling scenario is slower")
+    args = parser.parse_args(argv)
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = [name for name in endpoints if name not in ENDPOINTS and name != 'stream']
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(unknown)}")
+    if args.mode == 'replay' and not args.replay_file:
+        parser.error("--mode replay needs --replay-file")
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port, pid = parts.hostname, parts.port or 80, None
+    else:
+        server = ServerProcess(args.port, args.mode, args.channels, args.interval, args.protocol,
+                               args.replay_file, args.speed)
+        server.start()
+        host, port, pid = '127.0.0.1', args.port, server.process.pid
+    stats = ProcessStats(pid)
+
+    results = []
+    try:
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        connection.request('GET', '/scales')
+        scale = json.loads(connection.getresponse().read())['scales'][0]['id']
+        connection.close()
+        print(f"Benchmarking http://{host}:{port} (scale '{scale}', {args.duration:g} s per scenario)\n")
+        for endpoint in endpoints:
+            for concurrency in levels:
+                if args.warmup > 0 and endpoint != 'stream':
+                    run_polling(host, port, ENDPOINTS[endpoint].format(scale=scale), concurrency,
+                                args.warmup, args.processes)
+                results.append(run_scenario(host, port, endpoint, concurrency, args.duration,
+                                            args.processes, stats, scale))
+    finally:
+        if server:
+            server.stop()
+
+    print_report(results)
+    if args.json_file:
+        with open(args.json_file, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'argv': sys.argv[1:]}, f, indent=2)
+
+    failures = []
+    for r in results:
+        if r['endpoint'] == 'stream':
+            continue
+        if args.max_p99_ms is not None and r['p99_ms'] > args.max_p99_ms:
+            failures.append(f"{r['endpoint']} x{r['concurrency']}: p99 {r['p99_ms']:.2f} ms > {args.max_p99_ms:g} ms")
+        if args.min_rps is not None and r['rps'] < args.min_rps:
+            failures.append(f"{r['endpoint']} x{r['concurrency']}: {r['rps']:.0f} req/s < {args.min_rps:g} req/s")
+        if r['errors']:
+            failures.append(f"{r['endpoint']} x{r['concurrency']}: {r['errors']} error(s)")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
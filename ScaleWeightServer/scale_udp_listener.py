@@ -0,0 +1,84 @@
+"""
+Scale Weight Server - reference UDP listener
+
+Receives the datagrams ScaleWeightServer publishes when "udp" is configured
+and prints one line per reading. Only the standard library is needed, so the
+decoding below can be copied into display or PLC gateway code as is.
+
+Examples:
+    python scale_udp_listener.py                              # default group 239.255.70.1:5005
+    python scale_udp_listener.py --group 239.255.70.1 --interface 192.168.1.20
+    python scale_udp_listener.py --group 127.0.0.1 --count 10  # unicast test on localhost
+"""
+
+import argparse
+import socket
+import struct
+import sys
+import time
+from datetime import datetime
+
+# Must match UDP_DATAGRAM in ScaleWeightServer.py
+UDP_MAGIC = b'SWU1'
+UDP_DATAGRAM = struct.Struct('!4s16sIdBd')
+FLAG_NAMES = ((0x01, 'stable'), (0x02, 'motion'), (0x04, 'overload'), (0x08, 'net'))
+
+
+def decode(datagram):
+    """Return (channel, seq, weight, flags, timestamp) or None if not a reading"""
+    if len(datagram) != UDP_DATAGRAM.size:
+        return None
+    magic, channel, seq, weight, flags, timestamp = UDP_DATAGRAM.unpack(datagram)
+    if magic != UDP_MAGIC:
+        return None
+    return channel.rstrip(b'\0').decode('utf-8', 'replace'), seq, weight, flags, timestamp
+
+
+def open_socket(group, port, interface):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('', port))
+    if socket.inet_aton(group)[0] in range(224, 240):
+        membership = socket.inet_aton(group) + socket.inet_aton(interface or '0.0.0.0')
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    return sock
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print readings published by ScaleWeightServer over UDP")
+    parser.add_argument('--group', default='239.255.70.1',
+                        help="multicast group to join; any other address just listens on the port")
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--interface', help="local address of the interface to join the group on")
+    parser.add_argument('--count', type=int, default=0, help="exit after this many readings (0: run forever)")
+    args = parser.parse_args(argv)
+
+    sock = open_socket(args.group, args.port, args.interface)
+    print(f"Listening on {args.group}:{args.port} (Ctrl+C to stop)")
+    received = 0
+    last_seq = {}
+    try:
+        while not args.count or received < args.count:
+            datagram, sender = sock.recvfrom(512)
+            reading = decode(datagram)
+            if reading is None:
+                continue
+            channel, seq, weight, flags, timestamp = reading
+            received += 1
+            # A gap means datagrams were lost (a lower seq is a server restart)
+            previous = last_seq.get(channel)
+            lost = seq - previous - 1 if previous is not None and seq > previous + 1 else 0
+            last_seq[channel] = seq
+            names = ','.join(name for bit, name in FLAG_NAMES if flags & bit) or '-'
+            print(f"{datetime.fromtimestamp(timestamp).strftime('%H:%M:%S.%f')[:-3]} {sender[0]} "
+                  f"{channel} #{seq} {weight:,.2f} kg [{names}] "
+                  f"age {(time.time() - timestamp) * 1000:.1f} ms" + (f" (lost {lost})" if lost else ""))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
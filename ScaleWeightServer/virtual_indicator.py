@@ -0,0 +1,181 @@
+"""
+Scale Weight Server - virtual serial indicator (Linux/macOS pseudo-terminal)
+
+Creates a pty that behaves like a weighbridge indicator on a serial port and
+links it at a stable path, so the server's hardware mode (the real pyserial
+read, framing and decoding path) can be exercised without a physical scale.
+Frames come from the same truck profile and protocol encoders the server's
+simulator uses; noise, line garbage, dropped bytes and cable disconnects can
+be injected at configurable rates.
+
+Examples:
+    python virtual_indicator.py --link /tmp/ttyVSCALE0 --protocol toledo --rate 20
+    python virtual_indicator.py --protocol sics --noise 5 --drop-rate 0.001 --garbage-rate 0.01
+    python virtual_indicator.py --disconnect-every 30 --disconnect-for 3 --duration 300
+
+Then point a channel at it:
+    {"channels": [{"id": "scale1", "mode": "hardware", "serial_port": "/tmp/ttyVSCALE0",
+                   "protocol": "toledo"}]}
+"""
+
+import argparse
+import os
+import random
+import signal
+import sys
+import threading
+import time
+import tty
+
+from ScaleWeightServer import PROTOCOLS, TruckProfileSource, create_protocol
+
+DEFAULT_LINK = '/tmp/ttyVSCALE0'
+
+
+class VirtualIndicator:
+    """One pseudo-terminal standing in for an indicator's serial port
+
+    The slave side is linked at ``link``; a disconnect closes the pty (the
+    reader gets an I/O error, like an unplugged USB adapter), removes the
+    link and later re-creates both, usually under another /dev/pts number.
+    """
+
+    def __init__(self, protocol, link, rate=10.0, speed=1.0, noise=3.0, division=10.0,
+                 weight=None, drop_rate=0.0, garbage_rate=0.0, seed=None):
+        self.protocol = protocol
+        self.link = link
+        self.interval = 1.0 / rate
+        self.speed = speed
+        # A fixed weight instead of the truck profile (steady throughput runs)
+        self.weight = weight
+        self.drop_rate = drop_rate
+        self.garbage_rate = garbage_rate
+        self.random = random.Random(seed)
+        self.profile = TruckProfileSource(protocol, speed=speed, division=division, noise=noise, seed=seed)
+        self.master = self.slave = None
+        self.stats = dict(frames=0, bytes=0, dropped_bytes=0, garbage=0, overflows=0, disconnects=0)
+
+    @property
+    def is_open(self):
+        return self.master is not None
+
+    def open(self):
+        self.master, self.slave = os.openpty()
+        # No echo or CR/LF translation: bytes reach the reader unchanged
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        temp_link = f"{self.link}.{os.getpid()}"
+        os.symlink(os.ttyname(self.slave), temp_link)
+        os.replace(temp_link, self.link)
+        return os.ttyname(self.slave)
+
+    def close(self):
+        if self.master is None:
+            return
+        try:
+            os.unlink(self.link)
+        except FileNotFoundError:
+            pass
+        os.close(self.master)
+        os.close(self.slave)
+        self.master = self.slave = None
+
+    def frame(self, elapsed):
+        """Encoded frame for profile time elapsed (seconds)"""
+        if self.weight is not None:
+            weight = round(self.weight + self.random.gauss(0.0, self.profile.noise), 2)
+            return self.protocol.encode(weight)
+        weight, motion = self.profile.weight_at(elapsed * self.speed)
+        return self.protocol.encode(weight, motion=motion)
+
+    def write(self, data):
+        if self.garbage_rate and self.random.random() < self.garbage_rate:
+            # Line noise: a burst of random bytes between frames
+            data = bytes(self.random.randrange(256) for _ in range(self.random.randint(1, 16))) + data
+            self.stats['garbage'] += 1
+        if self.drop_rate:
+            kept = bytes(byte for byte in data if self.random.random() >= self.drop_rate)
+            self.stats['dropped_bytes'] += len(data) - len(kept)
+            data = kept
+        try:
+            written = os.write(self.master, data)
+        except BlockingIOError:
+            # Nobody is reading and the tty buffer is full; a real indicator
+            # just keeps talking, so the frame is lost
+            self.stats['overflows'] += 1
+            return
+        self.stats['frames'] += 1
+        self.stats['bytes'] += written
+
+    def run(self, stop, duration=None, disconnect_every=None, disconnect_for=1.0, log=print):
+        started = time.monotonic()
+        self.profile.open()
+        log(f"Virtual {self.protocol.label} indicator on {self.open()} -> {self.link}")
+        next_frame = next_disconnect = started
+        if disconnect_every:
+            next_disconnect = started + disconnect_every
+        while not stop.is_set():
+            now = time.monotonic()
+            if duration and now - started >= duration:
+                break
+            if disconnect_every and now >= next_disconnect:
+                self.close()
+                self.stats['disconnects'] += 1
+                log(f"Disconnected for {disconnect_for:g} s")
+                if stop.wait(disconnect_for):
+                    break
+                log(f"Reconnected on {self.open()} -> {self.link}")
+                next_disconnect = time.monotonic() + disconnect_every
+                continue
+            if now >= next_frame:
+                self.write(self.frame(now - started))
+                # Catch up after a late wake-up instead of drifting
+                next_frame = max(next_frame + self.interval, now - self.interval)
+            stop.wait(max(0.0, next_frame - time.monotonic()))
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emulate a serial weighbridge indicator on a pty")
+    parser.add_argument('--link', default=DEFAULT_LINK, help="stable path to the pty (default: %(default)s)")
+    parser.add_argument('--protocol', choices=sorted(PROTOCOLS), default='toledo')
+    parser.add_argument('--rate', type=float, default=10.0, help="frames per second")
+    parser.add_argument('--speed', type=float, default=1.0, help="truck profile speed factor")
+    parser.add_argument('--weight', type=float, help="send this weight steadily instead of truck traffic")
+    parser.add_argument('--noise', type=float, default=3.0, help="weight noise standard deviation (kg)")
+    parser.add_argument('--division', type=float, default=10.0, help="indicator division (kg)")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="probability of losing each byte")
+    parser.add_argument('--garbage-rate', type=float, default=0.0,
+                        help="probability of a random byte burst before each frame")
+    parser.add_argument('--disconnect-every', type=float, help="unplug the port every N seconds")
+    parser.add_argument('--disconnect-for', type=float, default=1.0, help="seconds each disconnect lasts")
+    parser.add_argument('--duration', type=float, help="exit after N seconds (default: until Ctrl+C)")
+    parser.add_argument('--seed', type=int, help="random seed for repeatable runs")
+    args = parser.parse_args(argv)
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    indicator = VirtualIndicator(create_protocol(args.protocol), args.link, rate=args.rate, speed=args.speed,
+                                 noise=args.noise, division=args.division, weight=args.weight,
+                                 drop_rate=args.drop_rate, garbage_rate=args.garbage_rate, seed=args.seed)
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    def log(message):
+        print(f"{time.strftime('%H:%M:%S')} {message}", flush=True)
+
+    try:
+        indicator.run(stop, args.duration, args.disconnect_every, args.disconnect_for, log)
+    finally:
+        indicator.close()
+    log(' '.join(f"{key}={value}" for key, value in indicator.stats.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
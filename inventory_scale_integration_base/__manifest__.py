@@ -6,18 +6,27 @@
     'author': 'Gemy',
     'website': 'https://www.example.com',
     'license': 'LGPL-3',
-    'depends': ['mail', 'web', 'product'],
+    'depends': ['bus', 'mail', 'web', 'product'],
     'data': [
         'security/security.xml',
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'report/truck_weighing_reports.xml',
         'views/truck_weighing_views.xml',
         'views/weighing_scale_views.xml',
+        'views/weighing_scale_health_views.xml',
         'views/truck_fleet_views.xml',
         'views/res_users_views.xml',
         'views/product_views.xml',
         'views/menu_items_views.xml',
     ],
+    'assets': {
+        'web.assets_backend': [
+            'inventory_scale_integration_base/static/src/js/scale_live_weight.js',
+            'inventory_scale_integration_base/static/src/xml/scale_live_weight.xml',
+            'inventory_scale_integration_base/static/src/scss/scale_live_weight.scss',
+        ],
+    },
     'installable': True,
     'application': True,
 }
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.exceptions import UserError
+from odoo.http import request
+
+
+class TruckWeighingController(http.Controller):
+
+    @http.route('/scale/weighing/<int:weighing_id>/capture', type='jsonrpc', auth='user', methods=['POST'])
+    def capture_weight(self, weighing_id, **kwargs):
+        """Capture a stable weight as the weighing's next (first or second) weight"""
+        weighing = request.env['truck.weighing'].browse(weighing_id)
+        if not weighing.exists():
+            return {'success': False, 'error': 'Weighing not found'}
+        try:
+            weighing.action_capture_weight()
+        except UserError as e:
+            # Raised before anything is written
+            return {'success': False, 'error': str(e)}
+        return {
+            'success': True,
+            'state': weighing.state,
+            'weight': weighing.live_weight,
+            'gross_weight': weighing.gross_weight,
+            'tare_weight': weighing.tare_weight,
+            'net_weight': weighing.net_weight,
+        }
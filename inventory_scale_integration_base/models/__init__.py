@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from . import weighing_scale
+from . import weighing_scale_health
 from . import res_users
 from . import truck_fleet
 from . import product_template
 from . import truck_weighing
 from . import weighing_overview
+from . import ir_websocket
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+from .weighing_scale import LIVE_CHANNEL_PREFIX
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        # Live weight channels are plain strings anyone could ask for
+        if not self.env.user.has_group('inventory_scale_integration_base.group_scale_user'):
+            channels = [channel for channel in channels
+                        if not (isinstance(channel, str) and channel.startswith(LIVE_CHANNEL_PREFIX))]
+        return super()._build_bus_channel_list(channels)
@@ -165,6 +165,54 @@ class TruckWeighing(models.Model):
         self.second_time = fields.Datetime.now()
         self.state = 'second'
 
+    def action_capture_weight(self):
+        """Capture a stable weight from the scale as the next weighing
+
+        Fetching the live weight and setting the first or second weight in
+        one call: the scale is asked for a stable reading, which is checked
+        against the state and operation type and written in a single write
+        with a single chatter message.
+        """
+        self.ensure_one()
+        if self.state not in ('draft', 'first'):
+            raise UserError(_("Both weighings are already captured."))
+        if not self.scale_id:
+            raise UserError(_("Please select a weighing scale first."))
+
+        weight = self.scale_id.get_stable_weight()
+        if weight <= 0:
+            raise UserError(_("Scale '%s' reads %s KG. Is the truck on the scale?") % (self.scale_id.name, weight))
+
+        now = fields.Datetime.now()
+        vals = {'live_weight': weight}
+        # Incoming: full truck (gross) first, empty truck (tare) second
+        # Outgoing: empty truck (tare) first, full truck (gross) second
+        if self.state == 'draft':
+            if self.operation_type == 'incoming':
+                vals.update(gross_weight=weight, gross_date=now)
+                message = _("First weight (Gross - Full truck) captured from %s: %s KG")
+            else:
+                vals.update(tare_weight=weight, tare_date=now)
+                message = _("First weight (Tare - Empty truck) captured from %s: %s KG")
+            vals.update(first_time=now, state='first')
+        else:
+            if self.operation_type == 'incoming':
+                if weight >= self.gross_weight:
+                    raise UserError(_("Second weight (empty truck) must be less than first weight (full truck)."))
+                vals.update(tare_weight=weight, tare_date=now)
+                message = _("Second weight (Tare - Empty truck) captured from %s: %s KG")
+            else:
+                if weight <= self.tare_weight:
+                    raise UserError(_("Second weight (full truck) must be greater than first weight (empty truck)."))
+                vals.update(gross_weight=weight, gross_date=now)
+                message = _("Second weight (Gross - Full truck) captured from %s: %s KG")
+            vals.update(second_time=now, state='second')
+
+        # The message below records the capture; field tracking would add a second one
+        self.with_context(mail_notrack=True).write(vals)
+        self.message_post(body=message % (self.scale_id.name, weight))
+        return True
+
     # Keep old methods for backward compatibility
     def action_set_gross_from_live(self):
         return self.action_set_first_weight()
@@ -1,7 +1,90 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import json
+import os
+import threading
+import time
+import psycopg2
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote
+
+# Keep-alive HTTP sessions, one per (worker process, scale server), so
+# repeated fetches reuse an open TCP connection instead of paying a new
+# handshake (and DNS lookup) each time. The pid is part of the key because
+# Odoo's prefork workers are forked: a session inherited from the parent
+# process must never be shared with it.
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+# Connections kept per scale server and worker (threads of one worker share them)
+SESSION_POOL_SIZE = 4
+
+
+def _get_session(base_url):
+    key = (os.getpid(), base_url)
+    session = _SESSIONS.get(key)
+    if session is None:
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(key)
+            if session is None:
+                # Forget (without closing: the sockets belong to the parent) sessions of another process
+                for stale_key in [k for k in _SESSIONS if k[0] != key[0]]:
+                    del _SESSIONS[stale_key]
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SESSION_POOL_SIZE, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _SESSIONS[key] = session
+    return session
+
+
+# Latest reading and circuit breaker state per scale, shared by all workers.
+# UNLOGGED: no WAL traffic, and losing it in a crash only costs one extra
+# fetch (and closes the breakers).
+READING_CACHE_TABLE = 'weighing_scale_reading_cache'
+# First half of the per-scale advisory lock held while one worker fetches
+# (or probes a scale whose breaker is half-open)
+READING_LOCK_KEY = 0x5CA1E
+# last_read_* is persisted at most this often while the status is unchanged
+LAST_READ_WRITE_INTERVAL = 30
+# Scales probed at once by the health cron
+HEALTH_CHECK_WORKERS = 16
+# Live weight on the bus: one channel per scale, fed by a single cron job
+# for as long as some widget watches the scale (see static/src/js/scale_live_weight.js)
+LIVE_CHANNEL_PREFIX = 'weighing_scale_'
+LIVE_NOTIFICATION = 'weighing_scale/reading'
+# Seconds between two readings published by the feeder, and how long one cron run feeds
+# before handing over to the next one (so other cron jobs get the worker in between)
+LIVE_FEED_INTERVAL = 0.5
+LIVE_FEED_DURATION = 15
+# Longest the feeder waits on one scale: a live reading older than this is of no use
+LIVE_PROBE_TIMEOUT = 1.0
+# A watch lapses after this long unless the widget renews it
+LIVE_WATCH_SECONDS = 60
+# An unchanged reading is published again this often, so widgets can tell
+# a quiet scale from a feeder that stopped
+LIVE_HEARTBEAT = 5
+
+
+def _probe_scale(base_url, weight_url, timeout):
+    """Fetch one reading without touching the ORM (runs in a worker thread)
+
+    Returns (latency in ms, JSON data or None, error message or None).
+    """
+    started = time.monotonic()
+    try:
+        response = _get_session(base_url).get(weight_url, timeout=timeout)
+        if response.status_code != 200:
+            return (time.monotonic() - started) * 1000, None, f"HTTP {response.status_code}"
+        data = response.json()
+    except Exception as e:
+        return (time.monotonic() - started) * 1000, None, str(e)
+    return (time.monotonic() - started) * 1000, data, None
+
 
 class WeighingScale(models.Model):
     _name = 'weighing.scale'
@@ -14,7 +97,34 @@ class WeighingScale(models.Model):
     
     ip_address = fields.Char(string='IP Address', required=True, tracking=True)
     port = fields.Integer(string='Port', required=True, default=5000, tracking=True)
-    timeout = fields.Integer(string='Timeout (seconds)', default=2)
+    channel = fields.Char(string='Scale Channel', tracking=True,
+                          help="Channel id on a multi-scale server (e.g. scale2). Leave empty to use the server's default scale.")
+    timeout = fields.Integer(string='Timeout (seconds)', default=2,
+                             help="How long to wait for the scale server to answer once connected.")
+    connect_timeout = fields.Float(string='Connect Timeout (seconds)', default=1.0,
+                                   help="How long to wait for a new connection to the scale server. "
+                                        "Connections are kept open and reused, so this is rarely paid.")
+    cache_ttl = fields.Float(string='Reading Cache (seconds)', default=0.5,
+                             help="Users fetching the weight within this time of each other share one "
+                                  "request to the scale. 0 disables sharing.")
+    stable_wait = fields.Integer(string='Stable Wait (seconds)', default=10,
+                                 help="How long capturing a weight waits for the scale to settle "
+                                      "(at most 30 s) before giving up.")
+    breaker_threshold = fields.Integer(string='Failures Before Pausing', default=3,
+                                       help="After this many consecutive failures to reach the scale server, "
+                                            "fetches fail immediately instead of waiting for the timeout. "
+                                            "0 disables the circuit breaker.")
+    breaker_open_seconds = fields.Integer(string='Pause Duration (seconds)', default=30,
+                                          help="How long fetches fail immediately before one request "
+                                               "checks whether the scale server is back.")
+    breaker_state = fields.Selection([
+        ('closed', 'Closed'),
+        ('open', 'Open'),
+        ('half_open', 'Half-Open')
+    ], string='Circuit Breaker', compute='_compute_breaker_state',
+        help="Closed: fetching normally. Open: the scale server is unreachable and fetches fail "
+             "immediately. Half-Open: the pause is over and the next fetch checks the server.")
+    breaker_failures = fields.Integer(string='Consecutive Failures', compute='_compute_breaker_state')
     
     is_enabled = fields.Boolean(string='Enabled', default=True, tracking=True)
     connection_status = fields.Selection([
@@ -30,7 +140,38 @@ class WeighingScale(models.Model):
     user_ids = fields.Many2many('res.users', 'scale_user_rel', 'scale_id', 'user_id', string='Assigned Users')
     notes = fields.Text(string='Notes')
     weighing_count = fields.Integer(string='Weighing Records', compute='_compute_weighing_count')
+    health_ids = fields.One2many('weighing.scale.health', 'scale_id', string='Health History')
     
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE UNLOGGED TABLE IF NOT EXISTS {READING_CACHE_TABLE} (
+                scale_id integer PRIMARY KEY,
+                fetched_at timestamptz NOT NULL,
+                data jsonb,
+                error text,
+                failures integer NOT NULL DEFAULT 0,
+                opened_until timestamptz,
+                watched_until timestamptz
+            )
+        """)
+
+    def _compute_breaker_state(self):
+        states = {}
+        scale_ids = [scale_id for scale_id in self.ids if isinstance(scale_id, int)]
+        if scale_ids:
+            self.env.cr.execute(f"""
+                SELECT scale_id, failures, opened_until > clock_timestamp()
+                  FROM {READING_CACHE_TABLE} WHERE scale_id = ANY(%s)
+            """, [scale_ids])
+            states = {scale_id: (failures, is_open) for scale_id, failures, is_open in self.env.cr.fetchall()}
+        for scale in self:
+            failures, is_open = states.get(scale.id, (0, False))
+            scale.breaker_failures = failures
+            if not scale.breaker_threshold or failures < scale.breaker_threshold:
+                scale.breaker_state = 'closed'
+            else:
+                scale.breaker_state = 'open' if is_open else 'half_open'
+
     def _compute_weighing_count(self):
         for record in self:
             record.weighing_count = self.env['truck.weighing'].search_count([('scale_id', '=', record.id)])
@@ -41,34 +182,214 @@ class WeighingScale(models.Model):
             if not record.ip_address or not record.port:
                 raise UserError(_("IP Address and Port are required."))
 
+    def _get_server_url(self):
+        self.ensure_one()
+        return f"http://{self.ip_address}:{self.port}"
+
+    def _get_weight_url(self):
+        self.ensure_one()
+        if self.channel:
+            return f"{self._get_server_url()}/scales/{quote(self.channel.strip(), safe='')}/weight"
+        return f"{self._get_server_url()}/get_weight"
+
+    def _request_reading(self, params=None, wait=0):
+        """Fetch the scale's current reading (JSON dict) over this worker's keep-alive session
+
+        wait: seconds the server may hold the request (e.g. ?wait_stable) on
+        top of the normal timeout.
+        """
+        self.ensure_one()
+        session = _get_session(self._get_server_url())
+        response = session.get(self._get_weight_url(), params=params,
+                               timeout=(self.connect_timeout or self.timeout, self.timeout + wait))
+        if response.status_code != 200:
+            raise Exception(_("Invalid response from scale"))
+        return response.json()
+
+    def _fetch_reading(self):
+        """Ask the scale server for a usable reading; returns (data, error message)
+
+        data is None only when the server itself could not be reached.
+        """
+        self.ensure_one()
+        try:
+            data = self._request_reading()
+        except Exception as e:
+            return None, str(e)
+        return data, self._check_source_state(data)
+
+    def _check_source_state(self, data):
+        """Error message if the server answered for an indicator that is not connected"""
+        # Never hand out a frozen value from an unplugged or silent indicator
+        source_state = data.get('source_state')
+        if source_state and source_state != 'connected':
+            return _("Scale indicator is %s (last reading %s ms old)") % (source_state, data.get('age_ms'))
+        return None
+
+    def _read_cached_reading(self, cr):
+        cr.execute(f"""
+            SELECT data, error FROM {READING_CACHE_TABLE}
+             WHERE scale_id = %s AND fetched_at > clock_timestamp() - make_interval(secs => %s)
+        """, [self.id, self.cache_ttl])
+        return cr.fetchone()
+
+    def _read_breaker(self, cr):
+        """Return ('closed' | 'open' | 'half_open', seconds until the next probe)"""
+        cr.execute(f"""
+            SELECT failures, EXTRACT(EPOCH FROM opened_until - clock_timestamp())::float
+              FROM {READING_CACHE_TABLE} WHERE scale_id = %s
+        """, [self.id])
+        row = cr.fetchone()
+        if not row or not self.breaker_threshold or row[0] < self.breaker_threshold:
+            return 'closed', 0
+        if row[1] is not None and row[1] > 0:
+            return 'open', row[1]
+        return 'half_open', 0
+
+    def _pass_breaker(self, cr):
+        """Return (breaker state, error message if the server must not be contacted now)
+
+        While the breaker is half-open, the one caller allowed through holds
+        an advisory lock until cr's transaction ends.
+        """
+        state, retry_in = self._read_breaker(cr)
+        if state == 'open':
+            return state, _("Scale server unreachable after repeated failures; not retrying for another %d s") % (retry_in + 0.5)
+        if state == 'half_open':
+            # Exactly one worker checks whether the server is back; the others fail fast
+            cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [READING_LOCK_KEY, self.id])
+            if not cr.fetchone()[0]:
+                return state, _("Scale server unreachable; checking whether it is back")
+        return state, None
+
+    def _record_breaker(self, cr, failed):
+        """Count a failure to reach the scale server, or reset after a success"""
+        for scale in self:
+            if failed:
+                # A failure at or past the threshold (re)opens the breaker
+                cr.execute(f"""
+                    INSERT INTO {READING_CACHE_TABLE} AS cache (scale_id, fetched_at, failures, opened_until)
+                    VALUES (%(id)s, '-infinity', 1, CASE WHEN 1 >= %(threshold)s
+                            THEN clock_timestamp() + make_interval(secs => %(pause)s) END)
+                    ON CONFLICT (scale_id) DO UPDATE
+                       SET failures = cache.failures + 1,
+                           opened_until = CASE WHEN cache.failures + 1 >= %(threshold)s
+                                               THEN clock_timestamp() + make_interval(secs => %(pause)s)
+                                               ELSE cache.opened_until END
+                """, {'id': scale.id, 'threshold': scale.breaker_threshold or None, 'pause': scale.breaker_open_seconds})
+            else:
+                cr.execute(f"""
+                    INSERT INTO {READING_CACHE_TABLE} AS cache (scale_id, fetched_at) VALUES (%s, '-infinity')
+                    ON CONFLICT (scale_id) DO UPDATE SET failures = 0, opened_until = NULL
+                     WHERE cache.failures > 0
+                """, [scale.id])
+
+    def _get_reading(self):
+        """Current (data, error) of the scale, fetched at most once per cache_ttl
+
+        A result (success or failure) fetched by any worker within cache_ttl
+        is reused. Otherwise one worker fetches while the others wait on an
+        advisory lock and then take its result, so concurrent users cost the
+        scale a single request. The cache has its own short transaction so
+        it is visible to other workers immediately.
+
+        A circuit breaker shared the same way stops workers from each
+        waiting out the timeout of an unreachable server: after
+        breaker_threshold consecutive failures fetches fail immediately for
+        breaker_open_seconds, then a single fetch checks the server again.
+        """
+        self.ensure_one()
+        with self.env.registry.cursor() as cr:
+            # Each statement must see readings committed by other workers meanwhile
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            if self.cache_ttl > 0:
+                cached = self._read_cached_reading(cr)
+                if cached:
+                    return cached
+            state, error = self._pass_breaker(cr)
+            if error:
+                return None, error
+            if state == 'closed' and self.cache_ttl > 0:
+                # Wait for an in-flight fetch no longer than a fetch may take
+                cr.execute("SET LOCAL lock_timeout = %s", [f"{int(((self.connect_timeout or 0) + self.timeout + 1) * 1000)}ms"])
+                try:
+                    with cr.savepoint():
+                        cr.execute("SELECT pg_advisory_xact_lock(%s, %s)", [READING_LOCK_KEY, self.id])
+                except psycopg2.errors.LockNotAvailable:
+                    return None, _("Timed out waiting for another reading from this scale")
+                cached = self._read_cached_reading(cr)
+                if cached:
+                    return cached
+            data, error = self._fetch_reading()
+            self._cache_reading(cr, data, error)
+            self._record_breaker(cr, failed=data is None)
+            self._store_status(cr, data, error)
+            # Committing releases the lock for the waiting workers
+            return data, error
+
+    def _cache_reading(self, cr, data, error):
+        if self.cache_ttl > 0:
+            cr.execute(f"""
+                INSERT INTO {READING_CACHE_TABLE} (scale_id, fetched_at, data, error)
+                VALUES (%s, clock_timestamp(), %s, %s)
+                ON CONFLICT (scale_id) DO UPDATE
+                   SET fetched_at = EXCLUDED.fetched_at, data = EXCLUDED.data, error = EXCLUDED.error
+            """, [self.id, json.dumps(data) if data is not None else None, error])
+
+    def _store_status(self, cr, data, error):
+        """Persist connection_status and last_read_* when they change or have aged
+
+        Writing on every read would serialize users on the scale row (and its
+        mail.thread bookkeeping); rows locked by another transaction are
+        skipped rather than waited for.
+        """
+        now = fields.Datetime.now()
+        stale = now - timedelta(seconds=LAST_READ_WRITE_INTERVAL)
+        if error:
+            # A server that answers for an unplugged indicator is 'disconnected'
+            status = 'disconnected' if data is not None else 'error'
+            cr.execute("""
+                UPDATE weighing_scale SET connection_status = %s, last_check_date = %s, error_message = %s
+                 WHERE id IN (SELECT id FROM weighing_scale
+                               WHERE id = %s AND (connection_status IS DISTINCT FROM %s
+                                                  OR error_message IS DISTINCT FROM %s
+                                                  OR last_check_date IS NULL OR last_check_date < %s)
+                                 FOR UPDATE SKIP LOCKED)
+            """, [status, now, error, self.id, status, error, stale])
+        else:
+            cr.execute("""
+                UPDATE weighing_scale SET connection_status = 'connected', last_check_date = %s,
+                       last_read_weight = %s, last_read_date = %s, error_message = NULL
+                 WHERE id IN (SELECT id FROM weighing_scale
+                               WHERE id = %s AND (connection_status IS DISTINCT FROM 'connected'
+                                                  OR last_read_date IS NULL OR last_read_date < %s)
+                                 FOR UPDATE SKIP LOCKED)
+            """, [now, data.get('weight', 0.0), now, self.id, stale])
+
     def action_test_connection(self):
         self.ensure_one()
+        data = None
         try:
-            url = f"http://{self.ip_address}:{self.port}/get_weight"
-            response = requests.get(url, timeout=self.timeout)
-            if response.status_code == 200:
-                data = response.json()
-                weight = data.get('weight', 0.0)
-                self.write({
-                    'connection_status': 'connected',
-                    'last_check_date': fields.Datetime.now(),
-                    'last_read_weight': weight,
-                    'last_read_date': fields.Datetime.now(),
-                    'error_message': False
-                })
-                self.message_post(body=_("Connection successful. Weight: %s KG") % weight)
-                return {
-                    'type': 'ir.actions.client',
-                    'tag': 'display_notification',
-                    'params': {
-                        'title': _('Success'),
-                        'message': _('Connected successfully. Weight: %s KG') % weight,
-                        'type': 'success',
-                        'sticky': False,
-                    }
+            data = self._request_reading()
+            weight = data.get('weight', 0.0)
+            self.write({
+                'connection_status': 'connected',
+                'last_check_date': fields.Datetime.now(),
+                'last_read_weight': weight,
+                'last_read_date': fields.Datetime.now(),
+                'error_message': False
+            })
+            self.message_post(body=_("Connection successful. Weight: %s KG") % weight)
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Success'),
+                    'message': _('Connected successfully. Weight: %s KG') % weight,
+                    'type': 'success',
+                    'sticky': False,
                 }
-            else:
-                raise Exception(_("Invalid response from scale"))
+            }
         except Exception as e:
             self.write({
                 'connection_status': 'error',
@@ -76,35 +397,232 @@ class WeighingScale(models.Model):
                 'error_message': str(e)
             })
             raise UserError(_("Connection failed: %s") % str(e))
+        finally:
+            # A manual test bypasses the circuit breaker but also updates it
+            with self.env.registry.cursor() as cr:
+                self._record_breaker(cr, failed=data is None)
 
     def get_weight(self):
         self.ensure_one()
         if not self.is_enabled:
             raise UserError(_("Scale '%s' is disabled.") % self.name)
         
-        try:
-            url = f"http://{self.ip_address}:{self.port}/get_weight"
-            response = requests.get(url, timeout=self.timeout)
-            if response.status_code == 200:
-                data = response.json()
-                weight = data.get('weight', 0.0)
-                self.write({
-                    'connection_status': 'connected',
-                    'last_check_date': fields.Datetime.now(),
-                    'last_read_weight': weight,
-                    'last_read_date': fields.Datetime.now(),
-                    'error_message': False
-                })
-                return weight
+        data, error = self._get_reading()
+        if error:
+            raise UserError(_("Error reading from scale '%s': %s") % (self.name, error))
+        return data.get('weight', 0.0)
+
+    def _live_channel(self):
+        self.ensure_one()
+        return f"{LIVE_CHANNEL_PREFIX}{self.id}"
+
+    def _live_payload(self, data, error):
+        """Bus message for one reading, as shown by the live-weight widget"""
+        self.ensure_one()
+        return {
+            'scale_id': self.id,
+            'weight': data.get('weight', 0.0) if data else None,
+            'stable': bool(data and data.get('stable')),
+            'unit': (data or {}).get('unit') or 'kg',
+            'error': error or False,
+        }
+
+    def _trigger_live_feed(self):
+        self.env.ref('inventory_scale_integration_base.ir_cron_weighing_scale_live_feed').sudo()._trigger()
+
+    def action_watch_live_weight(self):
+        """Keep the live weight of these scales published on their bus channels
+
+        Called by the live-weight widget when it subscribes, then again
+        before LIVE_WATCH_SECONDS run out. Returns the payload of each
+        scale's latest reading if it is recent, so the widget has a value
+        before the feeder's first message.
+        """
+        self.check_access('read')
+        scales = self.filtered('is_enabled')
+        if not scales:
+            return []
+        cr = self.env.cr
+        cr.execute(f"SELECT EXISTS(SELECT 1 FROM {READING_CACHE_TABLE} WHERE watched_until > clock_timestamp())")
+        feeding = cr.fetchone()[0]
+        cr.execute(f"""
+            INSERT INTO {READING_CACHE_TABLE} AS cache (scale_id, fetched_at, watched_until)
+            SELECT scale_id, '-infinity', clock_timestamp() + make_interval(secs => %s)
+              FROM unnest(%s::integer[]) AS scale_id
+            ON CONFLICT (scale_id) DO UPDATE SET watched_until = EXCLUDED.watched_until
+            RETURNING scale_id, data, error, fetched_at > clock_timestamp() - make_interval(secs => %s)
+        """, [LIVE_WATCH_SECONDS, scales.ids, LIVE_HEARTBEAT])
+        latest = [self.browse(scale_id)._live_payload(data, error)
+                  for scale_id, data, error, recent in cr.fetchall() if recent]
+        if not feeding:
+            # Start feeding now rather than at the cron's next scheduled run
+            self._trigger_live_feed()
+        return latest
+
+    @api.model
+    def _cron_feed_live_weight(self):
+        """Publish the readings of watched scales on their bus channels
+
+        Runs for up to LIVE_FEED_DURATION seconds, publishing every
+        LIVE_FEED_INTERVAL, and stops as soon as no widget watches any
+        scale. ir.cron never runs a job twice at once, so each scale has a
+        single feeder however many users watch it.
+
+        Scales are probed in parallel, at most LIVE_PROBE_TIMEOUT each, and
+        a tick only publishes the probes that have finished: a dead scale
+        never holds back the others. A reading another worker cached within
+        cache_ttl is published without a probe, and a scale whose circuit
+        breaker is open is not probed at all. Probe results fill the cache
+        and the breaker the fetch buttons use.
+        """
+        deadline = time.monotonic() + LIVE_FEED_DURATION
+        published = {}
+        probing = {}
+        cr = self.env.cr
+        with ThreadPoolExecutor(max_workers=HEALTH_CHECK_WORKERS) as executor:
+            while True:
+                started = time.monotonic()
+                cr.execute(f"SELECT scale_id FROM {READING_CACHE_TABLE} WHERE watched_until > clock_timestamp()")
+                scales = self.browse([row[0] for row in cr.fetchall()]).exists().filtered('is_enabled')
+                if not scales:
+                    return
+                if started >= deadline:
+                    # Hand over to the next run straight away instead of leaving
+                    # the widgets without readings until the next scheduled call
+                    self._trigger_live_feed()
+                    return
+                readings = {}
+                for scale in scales:
+                    future = probing.get(scale.id)
+                    if future is not None:
+                        if future.done():
+                            del probing[scale.id]
+                            latency, data, error = future.result()
+                            if not error:
+                                error = scale._check_source_state(data)
+                            scale._cache_reading(cr, data, error)
+                            scale._record_breaker(cr, failed=data is None)
+                            scale._store_status(cr, data, error)
+                            readings[scale] = data, error
+                        continue
+                    cached = scale._read_cached_reading(cr) if scale.cache_ttl > 0 else None
+                    if cached:
+                        readings[scale] = cached
+                        continue
+                    error = scale._pass_breaker(cr)[1]
+                    if error:
+                        readings[scale] = None, error
+                        continue
+                    timeout = min(scale.timeout, LIVE_PROBE_TIMEOUT)
+                    probing[scale.id] = executor.submit(_probe_scale, scale._get_server_url(), scale._get_weight_url(),
+                                                        (min(scale.connect_timeout or timeout, timeout), timeout))
+                for scale, reading in readings.items():
+                    payload = scale._live_payload(*reading)
+                    previous, sent_at = published.get(scale.id, (None, 0))
+                    if payload == previous and started - sent_at < LIVE_HEARTBEAT:
+                        continue
+                    self.env['bus.bus']._sendone(scale._live_channel(), LIVE_NOTIFICATION, payload)
+                    published[scale.id] = (payload, started)
+                # Bus messages are delivered when the transaction commits
+                cr.commit()
+                self.env.invalidate_all()
+                time.sleep(max(0.0, LIVE_FEED_INTERVAL - (time.monotonic() - started)))
+
+    def get_stable_weight(self):
+        """Wait for the scale to settle and return the stable weight
+
+        Always asks the scale itself: a capture must not reuse a cached
+        reading. It does go through the circuit breaker, so an unreachable
+        server fails fast instead of holding the worker for the whole wait.
+        Servers without stability detection answer right away without a
+        'stable' flag; their weight is taken as is.
+        """
+        self.ensure_one()
+        if not self.is_enabled:
+            raise UserError(_("Scale '%s' is disabled.") % self.name)
+        wait = min(max(self.stable_wait, 0), 30)
+        with self.env.registry.cursor() as cr:
+            error = self._pass_breaker(cr)[1]
+            if error:
+                raise UserError(_("Error reading from scale '%s': %s") % (self.name, error))
+            data = None
+            try:
+                data = self._request_reading({'wait_stable': wait * 1000}, wait=wait)
+            except Exception as e:
+                error = str(e)
             else:
-                raise Exception(_("Invalid response from scale"))
-        except Exception as e:
-            self.write({
-                'connection_status': 'error',
-                'last_check_date': fields.Datetime.now(),
-                'error_message': str(e)
+                # A server answering for an unplugged or silent indicator is stored as disconnected
+                source_state = data.get('source_state')
+                if source_state and source_state != 'connected':
+                    error = _("Scale indicator is %s (last reading %s ms old)") % (source_state, data.get('age_ms'))
+            self._record_breaker(cr, failed=data is None)
+            self._store_status(cr, data, error)
+        if error:
+            raise UserError(_("Error reading from scale '%s': %s") % (self.name, error))
+        if data.get('stable') is False:
+            raise UserError(_("The weight on scale '%s' did not settle within %s seconds. "
+                              "Make sure the truck is standing still and try again.") % (self.name, wait))
+        if data.get('stable_weight') is not None:
+            return data['stable_weight']
+        return data.get('weight', 0.0)
+
+    @api.model
+    def _cron_check_health(self):
+        """Probe every enabled scale in parallel and record the results"""
+        scales = self.search([('is_enabled', '=', True)])
+        if not scales:
+            return
+        # Plain values only: the probes run outside the ORM, in threads
+        targets = [(scale._get_server_url(), scale._get_weight_url(),
+                    (scale.connect_timeout or scale.timeout, scale.timeout)) for scale in scales]
+        with ThreadPoolExecutor(max_workers=min(HEALTH_CHECK_WORKERS, len(targets))) as executor:
+            results = list(executor.map(lambda target: _probe_scale(*target), targets))
+
+        now = fields.Datetime.now()
+        history = []
+        groups = defaultdict(lambda: self.browse())
+        messages = {}
+        for scale, (latency, data, error) in zip(scales, results):
+            status, message = 'error', error
+            if not error:
+                source_state = data.get('source_state')
+                if source_state and source_state != 'connected':
+                    # The server answers but its indicator does not
+                    status, message = 'disconnected', _("Scale indicator is %s") % source_state
+                else:
+                    status, message = 'connected', False
+            history.append({
+                'scale_id': scale.id,
+                'check_date': now,
+                'status': status,
+                'latency_ms': latency,
+                'message': message,
             })
-            raise UserError(_("Error reading from scale '%s': %s") % (self.name, str(e)))
+            groups[status] |= scale
+            if message:
+                messages[scale.id] = message
+            # The probe doubles as the breaker's check: a scale that is back
+            # is closed again before any user has to try it
+            scale._record_breaker(self.env.cr, failed=data is None)
+        # One write per status rather than one per scale; error messages carry
+        # per-scale detail, so they are set together in a single UPDATE
+        for status, group in groups.items():
+            values = {'connection_status': status, 'last_check_date': now}
+            if status == 'connected':
+                values['error_message'] = False
+            group.write(values)
+        if messages:
+            self.flush_model(['error_message'])
+            self.env.cr.execute("""
+                UPDATE weighing_scale AS scale SET error_message = result.message
+                  FROM unnest(%s::integer[], %s::text[]) AS result(id, message)
+                 WHERE scale.id = result.id
+            """, [list(messages), list(messages.values())])
+            self.browse(list(messages)).invalidate_recordset(['error_message'])
+        scales.invalidate_recordset(['breaker_state', 'breaker_failures'])
+        for values, scale in zip(history, scales):
+            values['breaker_state'] = scale.breaker_state
+        self.env['weighing.scale.health'].create(history)
 
     def action_enable(self):
         self.write({'is_enabled': True})
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+
+class WeighingScaleHealth(models.Model):
+    _name = 'weighing.scale.health'
+    _description = 'Weighing Scale Health Check'
+    _order = 'check_date desc, id desc'
+    # One row per scale per check: keep rows small
+    _log_access = False
+
+    # Health history is kept this long
+    _RETENTION_DAYS = 7
+
+    scale_id = fields.Many2one('weighing.scale', string='Scale', required=True, index=True, ondelete='cascade')
+    check_date = fields.Datetime(string='Checked At', required=True, index=True)
+    status = fields.Selection([
+        ('connected', 'Connected'),
+        ('disconnected', 'Disconnected'),
+        ('error', 'Error')
+    ], string='Status', required=True)
+    breaker_state = fields.Selection([
+        ('closed', 'Closed'),
+        ('open', 'Open'),
+        ('half_open', 'Half-Open')
+    ], string='Circuit Breaker')
+    latency_ms = fields.Float(string='Response Time (ms)', digits=(16, 1))
+    message = fields.Char(string='Message')
+
+    @api.autovacuum
+    def _gc_old_checks(self):
+        limit = fields.Datetime.now() - timedelta(days=self._RETENTION_DAYS)
+        self.search([('check_date', '<', limit)]).unlink()
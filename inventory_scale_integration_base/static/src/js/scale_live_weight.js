@@ -0,0 +1,120 @@
+/** @odoo-module **/
+
+import { Component, onWillUnmount, useEffect, useState } from "@odoo/owl";
+import { _t } from "@web/core/l10n/translation";
+import { registry } from "@web/core/registry";
+import { formatFloat } from "@web/core/utils/numbers";
+import { useService } from "@web/core/utils/hooks";
+import { standardWidgetProps } from "@web/views/widgets/standard_widget_props";
+
+// Must match LIVE_* in models/weighing_scale.py
+const CHANNEL_PREFIX = "weighing_scale_";
+const NOTIFICATION = "weighing_scale/reading";
+// Renew the watch well before it lapses on the server (LIVE_WATCH_SECONDS)
+const WATCH_RENEW_MS = 20000;
+// The feeder publishes at least every LIVE_HEARTBEAT seconds: silence means it stopped
+const STALE_MS = 12000;
+
+/**
+ * Weight of the record's scale, updated in real time from the scale's bus
+ * channel. A single server-side feeder reads the scale for all the users
+ * watching it, so showing the weight costs the scale nothing per user.
+ */
+export class ScaleLiveWeight extends Component {
+    static template = "inventory_scale_integration_base.ScaleLiveWeight";
+    static props = { ...standardWidgetProps };
+
+    setup() {
+        this.busService = useService("bus_service");
+        this.orm = useService("orm");
+        this.state = useState({ reading: null, receivedAt: 0, now: Date.now() });
+
+        this.onReading = this.onReading.bind(this);
+        this.busService.subscribe(NOTIFICATION, this.onReading);
+        onWillUnmount(() => this.busService.unsubscribe(NOTIFICATION, this.onReading));
+
+        useEffect(
+            (scaleId) => {
+                this.state.reading = null;
+                if (!scaleId) {
+                    return;
+                }
+                const channel = CHANNEL_PREFIX + scaleId;
+                this.busService.addChannel(channel);
+                this.watch(scaleId);
+                const renew = setInterval(() => this.watch(scaleId), WATCH_RENEW_MS);
+                const tick = setInterval(() => (this.state.now = Date.now()), 1000);
+                return () => {
+                    clearInterval(renew);
+                    clearInterval(tick);
+                    this.busService.deleteChannel(channel);
+                };
+            },
+            () => [this.scaleId]
+        );
+    }
+
+    get scaleId() {
+        const scale = this.props.record.data.scale_id;
+        return scale ? scale.id : false;
+    }
+
+    async watch(scaleId) {
+        let latest;
+        try {
+            latest = await this.orm.call("weighing.scale", "action_watch_live_weight", [[scaleId]]);
+        } catch {
+            // Readings simply stay stale; retried at the next renewal
+            return;
+        }
+        if (latest.length && !this.state.reading && scaleId === this.scaleId) {
+            this.applyReading(latest[0]);
+        }
+    }
+
+    onReading(payload) {
+        if (payload.scale_id === this.scaleId) {
+            this.applyReading(payload);
+        }
+    }
+
+    applyReading(payload) {
+        this.state.reading = payload;
+        this.state.receivedAt = Date.now();
+        this.state.now = this.state.receivedAt;
+    }
+
+    get status() {
+        const reading = this.state.reading;
+        if (!reading) {
+            return "waiting";
+        }
+        if (this.state.now - this.state.receivedAt > STALE_MS) {
+            return "stale";
+        }
+        if (reading.error) {
+            return "error";
+        }
+        return reading.stable ? "stable" : "motion";
+    }
+
+    get statusBadge() {
+        return {
+            waiting: { label: _t("Connecting"), className: "text-bg-secondary" },
+            stale: { label: _t("No Signal"), className: "text-bg-secondary" },
+            error: { label: _t("Error"), className: "text-bg-danger" },
+            stable: { label: _t("Stable"), className: "text-bg-success" },
+            motion: { label: _t("Motion"), className: "text-bg-warning" },
+        }[this.status];
+    }
+
+    get formattedWeight() {
+        const reading = this.state.reading;
+        if (!reading || reading.weight === null || this.status === "stale") {
+            return "--";
+        }
+        return formatFloat(reading.weight, { digits: [16, 2] });
+    }
+}
+
+registry.category("view_widgets").add("scale_live_weight", { component: ScaleLiveWeight });
@@ -12,6 +12,7 @@
         # 'report/truck_weighing_reports.xml',
         # 'views/truck_weighing_views.xml',
         # 'views/stock_picking_views.xml',
+        'views/weighing_scale_views.xml',
         'views/weighing_overview_views.xml',
         'views/menu_items_views.xml',
     ],
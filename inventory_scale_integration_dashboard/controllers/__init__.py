@@ -1,2 +1,3 @@
 # -*- coding: utf-8 -*-
 from . import weighing_dashboard
+from . import scale_controller
@@ -1,64 +1,140 @@
 # -*- coding: utf-8 -*-
 from odoo import http
 from odoo.http import request
+from datetime import datetime, timezone
 import json
 import logging
 
+import psycopg2
+
 _logger = logging.getLogger(__name__)
 
+
 class ScaleController(http.Controller):
 
     @http.route('/scale/receive_weight', type='http', auth='none', methods=['POST'], csrf=False)
     def receive_weight_from_scale(self, **kwargs):
         """
         API Endpoint to receive raw weight data from the external Python middleware.
-        The middleware must send 'weight' only.
+        The middleware sends either 'weight' only, or a batch of stable captures
+        from its outbox: {"readings": [{"key", "scale", "weight", "timestamp"}]}.
+        Captures are applied in order; a key that was already received returns
+        its original result instead of being applied twice.
+        The X-Scale-Token header identifies the gateway: only the scales
+        carrying that push token can receive its captures.
         """
         try:
+            token = request.httprequest.headers.get('X-Scale-Token') or ''
+            scales = request.env['weighing.scale']._get_push_scales(token)
+            if not scales:
+                _logger.warning("Rejected scale push from %s: no scale has its token", request.httprequest.remote_addr)
+                return json.dumps({'error': "Invalid scale token.", 'success': False})
+
             data = json.loads(request.httprequest.data.decode('utf-8'))
+            if 'readings' in data:
+                results = [self._receive_capture(scales, reading) for reading in data['readings']]
+                return json.dumps({'results': results, 'success': True})
+
             weight = data.get('weight')
             if not weight:
                 return json.dumps({'error': "Missing 'weight' in the request payload.", 'success': False})
 
-            weight = float(weight)
-
-            _logger.info("Received weight: %s KG", weight)
-
-            # البحث عن أحدث عملية موازنة مفتوحة
-            weighing_record = request.env['truck.weighing'].sudo().search([
-                ('state', 'in', ['draft', 'first'])
-            ], limit=1, order='create_date desc')
-
-            if not weighing_record:
-                return json.dumps({'error': "No active weighing record found. Please create a weighing record first.", 'success': False})
-
-            # 1. تسجيل الوزن القائم (Gross)
-            if weighing_record.state == 'draft':
-                weighing_record.sudo().write({
-                    'gross_weight': weight,
-                    'state': 'first',
-                })
-                message = f"Gross Weight ({weight} KG) recorded for {weighing_record.name} - Truck: {weighing_record.truck_plate}."
-            
-            # 2. تسجيل الوزن الفارغ (Tare)
-            elif weighing_record.state == 'first':
-                if weight >= weighing_record.gross_weight:
-                    # تفريغ غير مكتمل أو خطأ في الميزان
-                    return json.dumps({'error': f"Tare Weight ({weight} KG) must be less than Gross Weight ({weighing_record.gross_weight} KG). Please re-weigh the empty truck.", 'success': False})
-                    
-                weighing_record.sudo().write({
-                    'tare_weight': weight,
-                    'state': 'second',
-                })
-                # بعد تسجيل الوزن الفارغ، يتم حساب الوزن الصافي وتحديث المخزون
-                weighing_record.sudo().action_update_inventory()
-                message = f"Tare Weight ({weight} KG) recorded. Net Weight: {weighing_record.net_weight} KG. Inventory updated for {weighing_record.name} - Truck: {weighing_record.truck_plate}."
-
-            else:
-                 return json.dumps({'error': f"Weighing record {weighing_record.name} is in an unexpected state: {weighing_record.state}.", 'success': False})
-
-            return json.dumps({'message': message, 'success': True})
+            success, message, weighing_record = self._apply_weight(scales, float(weight))
+            return json.dumps({'message' if success else 'error': message, 'success': success})
 
         except Exception as e:
             _logger.error("Error receiving weight data: %s", str(e))
-            return json.dumps({'error': str(e), 'success': False})
\ No newline at end of file
+            return json.dumps({'error': str(e), 'success': False})
+
+    def _receive_capture(self, scales, reading):
+        """Apply one pushed capture at most once, keyed by its idempotency key"""
+        Receipt = request.env['scale.push.receipt'].sudo()
+        key = reading.get('key')
+        if not key:
+            return {'key': key, 'scale': reading.get('scale'), 'error': "Missing 'key'.", 'success': False}
+        receipt = Receipt.search([('key', '=', key)], limit=1)
+        if receipt:
+            return receipt._to_result()
+
+        captured_at = False
+        if reading.get('timestamp'):
+            captured_at = datetime.fromisoformat(reading['timestamp'])
+            if captured_at.tzinfo:
+                captured_at = captured_at.astimezone(timezone.utc).replace(tzinfo=None)
+        values = {
+            'key': key,
+            'scale_channel': reading.get('scale'),
+            'weight': reading.get('weight') or 0.0,
+            'captured_at': captured_at,
+        }
+        try:
+            try:
+                # The weighing update and its receipt commit or roll back together
+                with request.env.cr.savepoint():
+                    if reading.get('weight'):
+                        success, message, weighing_record = self._apply_weight(scales, float(reading['weight']), reading.get('scale'))
+                    else:
+                        success, message, weighing_record = False, "Missing 'weight' in the capture.", None
+                    receipt = Receipt.create(dict(values, success=success, message=message,
+                                                  weighing_id=weighing_record.id if weighing_record else False))
+            except psycopg2.IntegrityError:
+                raise
+            except Exception as e:
+                # Record the failure so the gateway does not retry it forever
+                _logger.error("Error applying scale capture %s: %s", key, str(e))
+                with request.env.cr.savepoint():
+                    receipt = Receipt.create(dict(values, success=False, message=str(e)))
+        except psycopg2.IntegrityError:
+            # The same capture is being applied by a concurrent delivery
+            return {'key': key, 'scale': reading.get('scale'), 'message': "Capture already received.", 'success': True}
+        return receipt._to_result()
+
+    def _apply_weight(self, scales, weight, channel=None):
+        """Record weight on the active weighing of the sending gateway's scale
+
+        scales are the scales of the gateway that pushed; channel names one of
+        them when the gateway serves several weighbridges.
+        Return (success, message, weighing record).
+        """
+        _logger.info("Received weight: %s KG", weight)
+
+        scale = scales._match_push_channel(channel)
+        if not scale:
+            # Never guess: a wrong match writes one site's truck onto another's weighing
+            if channel:
+                return False, f"No single weighing scale of this gateway is configured with channel '{channel}'.", None
+            return False, "This gateway serves several weighing scales; the capture must name its channel.", None
+
+        # البحث عن أحدث عملية موازنة مفتوحة
+        weighing_record = request.env['truck.weighing'].sudo().search(
+            [('state', 'in', ['draft', 'first']), ('scale_id', '=', scale.id)], limit=1, order='create_date desc')
+
+        if not weighing_record:
+            return False, "No active weighing record found. Please create a weighing record first.", None
+
+        # 1. تسجيل الوزن القائم (Gross)
+        if weighing_record.state == 'draft':
+            weighing_record.sudo().write({
+                'gross_weight': weight,
+                'state': 'first',
+            })
+            message = f"Gross Weight ({weight} KG) recorded for {weighing_record.name} - Truck: {weighing_record.truck_plate}."
+
+        # 2. تسجيل الوزن الفارغ (Tare)
+        elif weighing_record.state == 'first':
+            if weight >= weighing_record.gross_weight:
+                # تفريغ غير مكتمل أو خطأ في الميزان
+                return False, f"Tare Weight ({weight} KG) must be less than Gross Weight ({weighing_record.gross_weight} KG). Please re-weigh the empty truck.", weighing_record
+
+            weighing_record.sudo().write({
+                'tare_weight': weight,
+                'state': 'second',
+            })
+            # بعد تسجيل الوزن الفارغ، يتم حساب الوزن الصافي وتحديث المخزون
+            weighing_record.sudo().action_update_inventory()
+            message = f"Tare Weight ({weight} KG) recorded. Net Weight: {weighing_record.net_weight} KG. Inventory updated for {weighing_record.name} - Truck: {weighing_record.truck_plate}."
+
+        else:
+            return False, f"Weighing record {weighing_record.name} is in an unexpected state: {weighing_record.state}.", weighing_record
+
+        return True, message, weighing_record
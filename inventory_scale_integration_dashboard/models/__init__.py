@@ -2,3 +2,5 @@
 from . import truck_weighing
 from . import stock_picking
 from . import weighing_overview
+from . import scale_push_receipt
+from . import weighing_scale
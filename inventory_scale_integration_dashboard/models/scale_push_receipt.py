@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+
+class ScalePushReceipt(models.Model):
+    _name = 'scale.push.receipt'
+    _description = 'Pushed Scale Capture'
+    _order = 'id desc'
+
+    # Idempotency keys are kept this long; gateways retry far sooner
+    _RETENTION_DAYS = 30
+
+    key = fields.Char(string='Idempotency Key', required=True, index=True, readonly=True)
+    scale_channel = fields.Char(string='Scale Channel', readonly=True)
+    weight = fields.Float(string='Weight (KG)', readonly=True)
+    captured_at = fields.Datetime(string='Captured At', readonly=True)
+    weighing_id = fields.Many2one('truck.weighing', string='Weighing', ondelete='set null', readonly=True)
+    success = fields.Boolean(string='Applied', readonly=True)
+    message = fields.Char(string='Result', readonly=True)
+
+    # Concurrent deliveries of one capture rely on this index to apply it once
+    _key_unique = models.Constraint('unique(key)', 'Scale capture was already received!')
+
+    def _to_result(self):
+        self.ensure_one()
+        result = {'key': self.key, 'scale': self.scale_channel, 'success': self.success}
+        result['message' if self.success else 'error'] = self.message
+        return result
+
+    @api.autovacuum
+    def _gc_old_receipts(self):
+        limit = fields.Datetime.now() - timedelta(days=self._RETENTION_DAYS)
+        self.search([('create_date', '<', limit)]).unlink()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import hmac
+
+from odoo import api, fields, models
+
+
+class WeighingScale(models.Model):
+    _inherit = 'weighing.scale'
+
+    push_token = fields.Char(string='Push Token', copy=False,
+                             groups='inventory_scale_integration_base.group_scale_manager',
+                             help="Secret the scale server sends with pushed captures (its push 'token'). "
+                                  "Give every gateway its own token; scales read through the same "
+                                  "gateway share it. Pushes are refused for scales without one.")
+
+    @api.model
+    def _get_push_scales(self, token):
+        """Enabled scales of the gateway that sent token (compared in constant time)"""
+        if not token:
+            return self.browse()
+        scales = self.sudo().search([('push_token', '!=', False), ('is_enabled', '=', True)])
+        return scales.filtered(lambda scale: hmac.compare_digest(scale.push_token.encode('utf-8'),
+                                                                token.encode('utf-8')))
+
+    def _match_push_channel(self, channel):
+        """The one scale among self (a gateway's scales) a capture of channel belongs to
+
+        Returns an empty recordset when no scale, or more than one, matches:
+        a capture is never guessed onto a weighbridge.
+        """
+        channel = (channel or '').strip()
+        if not channel:
+            # Only a single-scale gateway may leave the channel out
+            return self if len(self) == 1 else self.browse()
+        scales = self.filtered(lambda scale: (scale.channel or '').strip() == channel)
+        if not scales and len(self) == 1 and not (self.channel or '').strip():
+            # A single scale without a channel takes the gateway's default one
+            scales = self
+        return scales if len(scales) == 1 else self.browse()
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_scale_push_receipt
+from . import test_weighing_scale_push
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import psycopg2
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestScalePushReceipt(TransactionCase):
+
+    @mute_logger('odoo.sql_db')
+    def test_key_is_unique(self):
+        """A second receipt for the same capture key is refused by the database"""
+        Receipt = self.env['scale.push.receipt']
+        Receipt.create({'key': 'capture-1', 'scale_channel': 'scale1', 'weight': 20000.0})
+        with self.assertRaises(psycopg2.IntegrityError), self.cr.savepoint():
+            Receipt.create({'key': 'capture-1', 'scale_channel': 'scale1', 'weight': 20000.0})
+            self.env.flush_all()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestWeighingScalePush(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Scale = cls.env['weighing.scale']
+        cls.north_1 = Scale.create({'name': 'North 1', 'ip_address': '10.0.1.5', 'channel': 'scale1', 'push_token': 'north'})
+        cls.north_2 = Scale.create({'name': 'North 2', 'ip_address': '10.0.1.5', 'channel': 'scale2', 'push_token': 'north'})
+        cls.south = Scale.create({'name': 'South', 'ip_address': '10.0.2.5', 'channel': 'scale1', 'push_token': 'south'})
+
+    def test_token_selects_gateway(self):
+        """Only the scales carrying the pushed token are candidates"""
+        Scale = self.env['weighing.scale']
+        self.assertEqual(Scale._get_push_scales('north'), self.north_1 | self.north_2)
+        self.assertFalse(Scale._get_push_scales('nort'))
+        self.assertFalse(Scale._get_push_scales(''))
+
+    def test_same_channel_on_two_sites(self):
+        """A default channel id shared by two gateways goes to the sending one"""
+        Scale = self.env['weighing.scale']
+        self.assertEqual(Scale._get_push_scales('south')._match_push_channel('scale1'), self.south)
+        self.assertEqual(Scale._get_push_scales('north')._match_push_channel('scale1'), self.north_1)
+
+    def test_ambiguous_match_is_refused(self):
+        """A capture is never guessed onto one of several scales"""
+        north = self.env['weighing.scale']._get_push_scales('north')
+        self.assertFalse(north._match_push_channel(None))
+        self.assertFalse(north._match_push_channel('scale3'))
+        self.north_2.channel = 'scale1'
+        self.assertFalse(north._match_push_channel('scale1'))
+        self.assertEqual(self.env['weighing.scale']._get_push_scales('south')._match_push_channel(None), self.south)